@@ -0,0 +1,74 @@
+import collections
+import re
+import time
+
+NUMBER = re.compile(r'0x[0-9a-fA-F]+|\d+')
+
+
+def fingerprint(error):
+    """Возвращает отпечаток ошибки: класс и сообщение без чисел и адресов."""
+    return type(error).__name__, NUMBER.sub('N', str(error))
+
+
+class ErrorRecord:
+    """Счётчик повторов одной ошибки в текущем окне."""
+
+    __slots__ = ('window_start', 'count')
+
+    def __init__(self, window_start):
+        """Открывает окно с первым повтором ошибки."""
+        self.window_start = window_start
+        self.count = 1
+
+
+class ErrorAggregator:
+    """Подавляет повторы ошибок и раз в окно собирает по ним сводку.
+
+    Для каждого арендатора хранится не более `max_size` отпечатков,
+    давно не встречавшиеся вытесняются первыми.
+    """
+
+    def __init__(self, window=3600, max_size=100):
+        """Задаёт окно сводки в секундах и число отпечатков на арендатора."""
+        self.window = window
+        self.max_size = max_size
+        self._tenants = {}
+
+    def record(self, tenant_id, error):
+        """Учитывает ошибку и сообщает, встретилась ли она впервые."""
+        records = self._tenants.setdefault(
+            tenant_id, collections.OrderedDict()
+        )
+        key = fingerprint(error)
+        record = records.get(key)
+        if record is not None:
+            record.count += 1
+            records.move_to_end(key)
+            return False
+        records[key] = ErrorRecord(time.monotonic())
+        if len(records) > self.max_size:
+            records.popitem(last=False)
+        return True
+
+    def summaries(self, tenant_id):
+        """Возвращает сводки по ошибкам, окно которых истекло."""
+        records = self._tenants.get(tenant_id)
+        if not records:
+            return []
+        now = time.monotonic()
+        minutes = round(self.window / 60)
+        result = []
+        for key, record in list(records.items()):
+            if now - record.window_start < self.window:
+                continue
+            if record.count > 1:
+                name, message = key
+                result.append(
+                    f'{name} x{record.count - 1} за последние {minutes} мин: '
+                    f'{message}'
+                )
+                record.window_start = now
+                record.count = 1
+            else:
+                del records[key]
+        return result
@@ -0,0 +1,119 @@
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import exceptions
+
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+BODY_CHUNK_SIZE = 16 * 1024
+
+
+@contextmanager
+def deadline(seconds):
+    """Ограничивает суммарное время запросов и чтения ответов в блоке."""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class BufferedResponse:
+    """Ответ requests с телом, уже прочитанным по кускам."""
+
+    def __init__(self, response, content):
+        """Запоминает исходный ответ и прочитанное тело."""
+        self.response = response
+        self.content = content
+
+    def __getattr__(self, name):
+        """Отдаёт остальные атрибуты исходного ответа."""
+        return getattr(self.response, name)
+
+    @property
+    def text(self):
+        """Тело ответа в виде строки."""
+        encoding = getattr(self.response, 'encoding', None) or 'utf-8'
+        return self.content.decode(encoding, 'replace')
+
+    def json(self, **kwargs):
+        """Разбирает тело ответа как JSON."""
+        return json.loads(self.content, **kwargs)
+
+
+class PracticumClient:
+    """HTTP-клиент с пулом keep-alive соединений и строгими таймаутами."""
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10, pool_size=20):
+        """Создаёт сессию с пулом на `pool_size` соединений."""
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def remaining(self):
+        """Остаток бюджета цикла в секундах или None без бюджета."""
+        expires = _deadline.get()
+        if expires is None:
+            return None
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise exceptions.DeadlineException(
+                'Исчерпан бюджет времени цикла опроса'
+            )
+        return remaining
+
+    def timeout(self):
+        """Таймауты соединения и чтения с учётом бюджета цикла."""
+        remaining = self.remaining()
+        if remaining is None:
+            return self.connect_timeout, self.read_timeout
+        return (
+            min(self.connect_timeout, remaining),
+            min(self.read_timeout, remaining),
+        )
+
+    def iter_content(self, response, chunk_size=BODY_CHUNK_SIZE):
+        """Читает тело ответа по кускам, проверяя бюджет цикла.
+
+        Одно чтение из сокета ограничено только таймаутом, выставленным
+        при отправке запроса, поэтому бюджет может быть превышен не
+        больше чем на него.
+        """
+        for chunk in response.iter_content(chunk_size):
+            self.remaining()
+            yield chunk
+
+    def get(self, url, stream=False, **kwargs):
+        """Выполняет GET-запрос через общий пул соединений.
+
+        При бюджете цикла тело ответа читается по кускам с проверкой
+        бюджета, а не целиком внутри requests.
+        """
+        timeout = self.timeout()
+        if _deadline.get() is None:
+            return self.session.get(
+                url, timeout=timeout, stream=stream, **kwargs
+            )
+        response = self.session.get(
+            url, timeout=timeout, stream=True, **kwargs
+        )
+        if not stream:
+            try:
+                content = b''.join(self.iter_content(response))
+            except Exception:
+                response.close()
+                raise
+            return BufferedResponse(response, content)
+        return response
+
+    def close(self):
+        """Закрывает все соединения пула."""
+        self.session.close()
@@ -0,0 +1,138 @@
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STAMP = re.compile(r'@(\d+\.\d+)"')
+
+
+class FakeServer(ThreadingHTTPServer):
+    """Локальный HTTP-сервер с настраиваемой задержкой и долей ошибок."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, handler, latency=0, error_rate=0):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        """Адрес сервера."""
+        host, port = self.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def handle_error(self, request, client_address):
+        """Не шумит, когда клиент закрывает keep-alive соединение."""
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def stop(self):
+        """Останавливает сервер."""
+        self.shutdown()
+        self.server_close()
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def should_fail(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            server.requests += 1
+            failed = random.random() < server.error_rate
+            server.errors += failed
+        return failed
+
+
+class PracticumHandler(FakeHandler):
+    """Ответы в формате API Практикума: каждый ответ — новые статусы."""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        if self.should_fail() or 'from_date' not in query:
+            self.reply(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+            return
+        now = time.time()
+        homeworks = [
+            {
+                'id': number,
+                'homework_name': f'hw{number}-{self.server.padding}@{now:.6f}',
+                'status': random.choice(('reviewing', 'approved', 'rejected')),
+                'reviewer_comment': '',
+                'date_updated': '2022-01-01T00:00:00Z',
+                'lesson_name': 'Бенчмарк',
+            }
+            for number in range(self.server.homeworks)
+        ]
+        self.reply(HTTPStatus.OK, {
+            'homeworks': homeworks, 'current_date': int(now),
+        })
+
+
+class TelegramHandler(FakeHandler):
+    """Bot API, который только запоминает время получения сообщений."""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if self.should_fail():
+            self.reply(HTTPStatus.INTERNAL_SERVER_ERROR, {
+                'ok': False, 'error_code': 500, 'description': 'fake error',
+            })
+            return
+        received = time.time()
+        match = STAMP.search(data.get('text', ''))
+        if match:
+            with self.server.lock:
+                self.server.latencies.append(received - float(match[1]))
+        self.reply(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': self.server.requests,
+            'date': int(received),
+            'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+def fake_practicum(latency=0, error_rate=0, homeworks=1, padding=0):
+    """Запускает заглушку API Практикума."""
+    server = FakeServer(PracticumHandler, latency, error_rate)
+    server.homeworks = homeworks
+    server.padding = 'x' * padding
+    return server.start()
+
+
+def fake_telegram(latency=0, error_rate=0):
+    """Запускает заглушку Telegram Bot API."""
+    server = FakeServer(TelegramHandler, latency, error_rate)
+    server.latencies = []
+    return server.start()
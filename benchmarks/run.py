@@ -0,0 +1,163 @@
+"""Нагрузочный прогон конвейера опроса на локальных заглушках.
+
+Пример:
+    python benchmarks/run.py --tenants 1 100 10000 --duration 30
+
+Для каждого числа арендаторов конвейер запускается в отдельном
+процессе, чтобы пиковый RSS не смешивался между прогонами. Итоги
+дописываются в benchmarks/results.jsonl вместе с хешем коммита.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+sys.path.insert(0, ROOT)
+
+from fake_servers import fake_practicum, fake_telegram  # noqa: E402
+
+
+def percentile(values, fraction):
+    """Возвращает перцентиль отсортированного списка."""
+    if not values:
+        return None
+    index = min(len(values) - 1, int(fraction * len(values)))
+    return values[index]
+
+
+def run_child(args):
+    """Гоняет настоящий конвейер homework.py и печатает итог в JSON."""
+    import homework
+    from state import StateStore
+    from tenants import Tenant
+
+    tenants = [
+        Tenant(number, f'token{number}', number)
+        for number in range(args.child)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        store = StateStore(os.path.join(directory, 'state.db'))
+        outbox, scheduler = homework.create_pipeline(
+            homework.create_bot(), store, tenants
+        )
+
+        async def run():
+            try:
+                await asyncio.wait_for(scheduler.run(), args.duration)
+            except asyncio.TimeoutError:
+                pass
+
+        asyncio.run(run())
+        print(json.dumps({
+            'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'overruns': scheduler.overruns,
+            'outbox_left': len(outbox),
+        }))
+
+
+def run_scenario(args, tenants):
+    """Запускает заглушки и дочерний процесс для одного сценария."""
+    practicum = fake_practicum(
+        args.api_latency, args.api_error_rate, args.homeworks, args.padding
+    )
+    telegram = fake_telegram(args.telegram_latency, args.telegram_error_rate)
+    env = dict(
+        os.environ,
+        PRACTICUM_ENDPOINT=f'{practicum.url}/api/user_api/homework_statuses/',
+        TELEGRAM_API_URL=f'{telegram.url}/bot',
+        TELEGRAM_TOKEN='1234:bench',
+        RETRY_TIME=str(args.period),
+        POLL_POLICY='fixed',
+        POLL_STARTUP_JITTER='0',
+        MAX_CONCURRENCY=str(args.concurrency),
+        TELEGRAM_WORKERS=str(args.telegram_workers),
+        TELEGRAM_RATE_LIMIT=str(args.telegram_rate),
+        TELEGRAM_CHAT_RATE_LIMIT=str(args.telegram_rate),
+    )
+    started = time.monotonic()
+    child = subprocess.run(
+        [sys.executable, __file__, '--child', str(tenants),
+         '--duration', str(args.duration)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed = time.monotonic() - started
+    practicum.stop()
+    telegram.stop()
+    report = json.loads(child.stdout.strip().splitlines()[-1])
+    latencies = sorted(telegram.latencies)
+    report.update({
+        'tenants': tenants,
+        'polls_per_second': round(practicum.requests / elapsed, 2),
+        'messages_per_second': round(len(latencies) / elapsed, 2),
+        'api_errors': practicum.errors,
+        'telegram_errors': telegram.errors,
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p99': percentile(latencies, 0.99),
+    })
+    return report
+
+
+def git_commit():
+    """Возвращает хеш текущего коммита, если он доступен."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    """Разбирает параметры прогона."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, nargs='+',
+                        default=[1, 100, 10000])
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--period', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--padding', type=int, default=0,
+                        help='лишние символы в каждой работе ответа')
+    parser.add_argument('--api-latency', type=float, default=0.02)
+    parser.add_argument('--api-error-rate', type=float, default=0)
+    parser.add_argument('--telegram-latency', type=float, default=0.02)
+    parser.add_argument('--telegram-error-rate', type=float, default=0)
+    parser.add_argument('--telegram-workers', type=int, default=8)
+    parser.add_argument('--telegram-rate', type=float, default=10000)
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    """Прогоняет сценарии и сохраняет результаты."""
+    args = parse_args()
+    if args.child is not None:
+        run_child(args)
+        return
+    scenarios = [run_scenario(args, tenants) for tenants in args.tenants]
+    result = {
+        'commit': git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'params': {
+            key: value for key, value in vars(args).items()
+            if key not in ('tenants', 'child')
+        },
+        'scenarios': scenarios,
+    }
+    with open(RESULTS_FILE, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(result, ensure_ascii=False) + '\n')
+    for scenario in scenarios:
+        print(json.dumps(scenario, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
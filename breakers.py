@@ -0,0 +1,159 @@
+import contextlib
+import threading
+import time
+
+import exceptions
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Размыкает цепь после серии сбоев зависимости.
+
+    В состоянии `open` вызовы сразу отклоняются. Через `reset_timeout`
+    секунд цепь переходит в `half_open` и пропускает не более
+    `probes` пробных вызовов: успех замыкает цепь, сбой снова размыкает.
+    """
+
+    def __init__(self, name, threshold=5, reset_timeout=60, probes=1):
+        """Создаёт замкнутый предохранитель."""
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0
+        self._probing = 0
+        self._lock = threading.Lock()
+
+    def _check(self):
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_timeout
+                remaining -= time.monotonic()
+                if remaining > 0:
+                    raise exceptions.CircuitOpenException(
+                        f'{self.name} отключён после {self.failures} сбоев, '
+                        f'повтор через {remaining:.0f} с',
+                        remaining,
+                    )
+                self.state = HALF_OPEN
+                self._probing = 0
+            if self.state == HALF_OPEN:
+                if self._probing >= self.probes:
+                    raise exceptions.CircuitOpenException(
+                        f'{self.name} проверяется пробным запросом', 1
+                    )
+                self._probing += 1
+
+    def record_success(self):
+        """Учитывает успешный вызов."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Учитывает сбой вызова."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def __enter__(self):
+        """Пропускает вызов или отклоняет его при разомкнутой цепи."""
+        self._check()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Учитывает исход вызова, не подавляя исключение."""
+        if exc_type is None:
+            self.record_success()
+        else:
+            self.record_failure()
+        return False
+
+
+class SharedBreaker(CircuitBreaker):
+    """Общий предохранитель зависимости перед предохранителями ключей.
+
+    Размыкается, когда подряд сбоят вызовы `threshold` разных ключей:
+    сбои одного ключа, например неверный токен арендатора, цепь не
+    размыкают. Успешный вызов любого ключа сбрасывает счёт.
+    """
+
+    def __init__(self, name, threshold=5, reset_timeout=60, probes=1):
+        """Создаёт замкнутый общий предохранитель."""
+        super().__init__(name, threshold, reset_timeout, probes)
+        self._failed = set()
+
+    def record_success(self):
+        """Учитывает успешный вызов."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._failed.clear()
+
+    def record_failure(self, key=None):
+        """Учитывает сбой вызова для ключа."""
+        with self._lock:
+            self._failed.add(key)
+            self.failures = len(self._failed)
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def _release(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing -= 1
+
+    @contextlib.contextmanager
+    def guard(self, key):
+        """Пропускает вызов для ключа и учитывает его исход.
+
+        Отказ вложенного предохранителя ключа сбоем не считается.
+        """
+        self._check()
+        try:
+            yield self
+        except exceptions.CircuitOpenException:
+            self._release()
+            raise
+        except BaseException:
+            self.record_failure(key)
+            raise
+        self.record_success()
+
+
+class BreakerRegistry:
+    """Отдельные предохранители для каждого ключа зависимости."""
+
+    def __init__(self, dependency, threshold=5, reset_timeout=60, probes=1):
+        """Задаёт параметры предохранителей зависимости."""
+        self.dependency = dependency
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Возвращает предохранитель для ключа, создавая его при нужде."""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    f'{self.dependency} ({key})', self.threshold,
+                    self.reset_timeout, self.probes,
+                )
+                self._breakers[key] = breaker
+            return breaker
+
+    def reset(self):
+        """Забывает состояние всех предохранителей."""
+        with self._lock:
+            self._breakers.clear()
@@ -0,0 +1,71 @@
+import asyncio
+import heapq
+import itertools
+
+from outbox import TokenBucket
+
+
+class FairBudget:
+    """Общий бюджет запросов с взвешенной справедливой очередью.
+
+    Токены выдаются с частотой `rate`, а из ожидающих первым получает
+    токен запрос с наименьшей виртуальной меткой окончания: у каждого
+    ключа она растёт на 1 / weight за запрос. Поэтому частый ключ не
+    вытесняет редкие, а доля каждого пропорциональна его весу.
+    """
+
+    def __init__(self, rate, capacity=1):
+        """Задаёт общую частоту запросов и запас токенов."""
+        self.bucket = TokenBucket(rate, capacity)
+        self.granted = 0
+        self._counter = itertools.count()
+        self._waiters = []
+        self._finish = {}
+        self._virtual = 0
+        self._wakeup = None
+        self._task = None
+
+    def __len__(self):
+        """Возвращает число арендаторов в ожидании."""
+        return len(self._waiters)
+
+    async def acquire(self, key, weight=1):
+        """Ждёт очереди ключа и забирает токен бюджета."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._dispatch())
+        start = max(self._virtual, self._finish.get(key, 0))
+        finish = start + 1 / weight
+        self._finish[key] = finish
+        future = loop.create_future()
+        heapq.heappush(
+            self._waiters, (finish, next(self._counter), key, future)
+        )
+        self._wakeup.set()
+        await future
+
+    async def _dispatch(self):
+        while True:
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self.bucket.wait_time()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            finish, _, key, future = heapq.heappop(self._waiters)
+            if self._finish.get(key) == finish:
+                del self._finish[key]
+            if future.cancelled():
+                continue
+            self.bucket.take()
+            self.granted += 1
+            self._virtual = finish
+            future.set_result(None)
+
+    def close(self):
+        """Останавливает выдачу токенов."""
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,92 @@
+import gzip
+import json
+import threading
+import time
+import zlib
+
+GZIP_MAGIC = b'\x1f\x8b\x08'
+BLOCK_SIZE = 1 << 16
+
+
+class CaptureWriter:
+    """Пишет сырые ответы API в сжатый журнал JSON-строк.
+
+    Каждая запись сжимается отдельным членом gzip и сразу сбрасывается
+    на диск, поэтому журнал остаётся читаемым после аварийного
+    завершения, а после перезапуска запись продолжается в тот же файл.
+    """
+
+    def __init__(self, path):
+        """Открывает журнал на дозапись."""
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+
+    def write(self, tenant_id, from_date, status_code, body):
+        """Добавляет в журнал один ответ API."""
+        record = json.dumps({
+            'ts': time.time(),
+            'tenant': tenant_id,
+            'from_date': from_date,
+            'status': int(status_code),
+            'body': body,
+        }, ensure_ascii=False)
+        data = gzip.compress(f'{record}\n'.encode('utf-8'))
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(data)
+            self._file.flush()
+
+    def close(self):
+        """Закрывает журнал."""
+        with self._lock:
+            self._file.close()
+
+
+def _decoder():
+    return zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+
+def _members(file):
+    """Выдаёт (данные, целый ли член) для членов gzip по порядку.
+
+    Битый член пропускается до начала следующего, оборванный хвост
+    файла выдаётся с признаком False.
+    """
+    decoder = _decoder()
+    parts = []
+    pending = b''
+    while True:
+        data = pending or file.read(BLOCK_SIZE)
+        pending = b''
+        if not data:
+            break
+        try:
+            parts.append(decoder.decompress(data))
+        except zlib.error:
+            decoder, parts = _decoder(), []
+            start = data.find(GZIP_MAGIC, 1)
+            if start >= 0:
+                pending = data[start:]
+            continue
+        if decoder.eof:
+            yield b''.join(parts), True
+            pending = decoder.unused_data
+            decoder, parts = _decoder(), []
+    if parts:
+        yield b''.join(parts), False
+
+
+def read_captures(path):
+    """Читает записи журнала ответов API по одной.
+
+    Записи, оборванные аварийным завершением процесса, пропускаются.
+    """
+    with open(path, 'rb') as file:
+        for data, complete in _members(file):
+            lines = data.decode('utf-8', 'replace').split('\n')
+            if not complete:
+                lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
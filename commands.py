@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def parse_command(text):
+    """Разбирает «/команда@бот аргументы» на команду и аргументы."""
+    if not text or not text.startswith('/'):
+        return None, ''
+    command, _, args = text[1:].partition(' ')
+    return command.split('@', 1)[0].lower(), args.strip()
+
+
+class CommandListener:
+    """Принимает команды бота через long polling getUpdates.
+
+    `handlers` сопоставляет имени команды функцию
+    `handler(chat_id, args)`, возвращающую текст ответа или None;
+    обработчик с ключом None отвечает на неизвестные команды. Ответ
+    уходит через `reply(chat_id, text)`. Команды старше `max_age` секунд,
+    накопившиеся, пока бот не работал, пропускаются.
+    """
+
+    def __init__(self, bot, handlers, reply, timeout=30, max_age=60,
+                 retry_time=5):
+        """Задаёт обработчики команд и параметры long polling."""
+        self.bot = bot
+        self.handlers = handlers
+        self.reply = reply
+        self.timeout = timeout
+        self.max_age = max_age
+        self.retry_time = retry_time
+        self.offset = None
+        self.handled = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def handle(self, update):
+        """Отвечает на одно обновление Telegram."""
+        message = update.effective_message
+        if message is None:
+            return
+        command, args = parse_command(message.text)
+        if command is None:
+            return
+        if time.time() - message.date.timestamp() > self.max_age:
+            logger.debug(f'Пропущена устаревшая команда /{command}')
+            return
+        handler = self.handlers.get(command, self.handlers.get(None))
+        if handler is None:
+            return
+        text = handler(message.chat_id, args)
+        self.handled += 1
+        if text:
+            self.reply(message.chat_id, text)
+
+    def poll_once(self):
+        """Забирает накопившиеся обновления и обрабатывает их."""
+        updates = self.bot.get_updates(
+            offset=self.offset, timeout=self.timeout,
+            allowed_updates=['message'],
+        )
+        for update in updates:
+            self.offset = update.update_id + 1
+            try:
+                self.handle(update)
+            except Exception as error:
+                logger.exception(f'Ошибка обработки команды: {error}')
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll_once()
+            except Exception as error:
+                logger.warning(f'Не удалось получить команды: {error}')
+                self._stopped.wait(self.retry_time)
+
+    def start(self):
+        """Запускает фоновый приём команд."""
+        self._thread = threading.Thread(
+            target=self._run, name='commands', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает приём команд после текущего запроса."""
+        self._stopped.set()
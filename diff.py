@@ -0,0 +1,107 @@
+import collections
+import sys
+import time
+
+
+class HomeworkRecord:
+    """Последний отправленный статус домашней работы."""
+
+    __slots__ = ('status', 'date_updated')
+
+    def __init__(self, status, date_updated=None):
+        """Запоминает статус и время его обновления."""
+        self.status = sys.intern(status)
+        self.date_updated = date_updated
+
+
+class StatusDiff:
+    """Сравнивает ответ API с прошлым снимком и находит смены статусов.
+
+    Снимок арендатора поднимается из хранилища при первом обращении,
+    а подтверждённые переходы сохраняются обратно. Последние
+    `history_size` переходов каждого арендатора хранятся в памяти.
+    """
+
+    def __init__(self, store, history_size=20):
+        """Создаёт пустой кэш снимков поверх хранилища."""
+        self.store = store
+        self.history_size = history_size
+        self._snapshots = {}
+        self._history = {}
+
+    def _snapshot(self, tenant_id):
+        snapshot = self._snapshots.get(tenant_id)
+        if snapshot is None:
+            snapshot = {
+                name: HomeworkRecord(status)
+                for name, status in self.store.load_statuses(tenant_id).items()
+            }
+            # Снимок могут поднять одновременно опрос и команда: остаётся
+            # первый, чтобы не потерять отметки опроса.
+            snapshot = self._snapshots.setdefault(tenant_id, snapshot)
+        return snapshot
+
+    def iter_changes(self, tenant_id, homeworks):
+        """Выдаёт работы со сменой статуса по мере чтения ответа.
+
+        Помнит только имена уже встреченных работ, поэтому подходит для
+        потокового разбора ответа любой длины.
+        """
+        snapshot = self._snapshot(tenant_id)
+        seen = set()
+        for homework in homeworks:
+            name = homework.get('homework_name')
+            # API отдаёт работы от новых к старым: берём первую запись.
+            if name in seen:
+                continue
+            seen.add(name)
+            record = snapshot.get(name)
+            if record is None or record.status != homework.get('status'):
+                yield homework
+
+    def changes(self, tenant_id, homeworks):
+        """Возвращает работы, статус которых изменился с прошлого снимка."""
+        return list(self.iter_changes(tenant_id, homeworks))
+
+    def mark(self, tenant_id, homework):
+        """Запоминает статус работы в памяти, не сохраняя в хранилище.
+
+        Повторный опрос до доставки уведомления не найдёт смены статуса,
+        а после перезапуска уведомление будет отправлено снова.
+        """
+        name, status = homework['homework_name'], homework['status']
+        self._snapshot(tenant_id)[name] = HomeworkRecord(
+            status, homework.get('date_updated')
+        )
+        history = self._history.get(tenant_id)
+        if history is None:
+            history = collections.deque(maxlen=self.history_size)
+            self._history[tenant_id] = history
+        history.append((time.time(), name, status))
+
+    def commit(self, tenant_id, homework):
+        """Запоминает отправленный статус работы и сохраняет его."""
+        self.mark(tenant_id, homework)
+        self.store.set_status(
+            tenant_id, homework['homework_name'], homework['status']
+        )
+
+    def statuses(self, tenant_id):
+        """Возвращает текущие статусы работ арендатора."""
+        snapshot = dict(self._snapshot(tenant_id))
+        return {name: record.status for name, record in snapshot.items()}
+
+    def history(self, tenant_id):
+        """Возвращает последние переходы: (время, работа, статус)."""
+        return list(self._history.get(tenant_id, ()))
+
+    def forget(self, tenant_id):
+        """Сбрасывает снимок арендатора, чтобы перечитать его из хранилища."""
+        self._snapshots.pop(tenant_id, None)
+
+    def has_status(self, tenant_id, status):
+        """Проверяет, есть ли у арендатора работа в указанном статусе."""
+        return any(
+            record.status == status
+            for record in self._snapshot(tenant_id).values()
+        )
@@ -0,0 +1,146 @@
+import functools
+import threading
+import time
+
+from outbox import LANE_STATUS, Countdown
+
+MESSAGE_LIMIT = 4096
+DIGEST_HEADER = 'Изменились статусы проверки работ ({count}):'
+
+
+def _split_line(line, limit):
+    return [line[start:start + limit] for start in range(0, len(line), limit)]
+
+
+def _call_all(callbacks):
+    for callback in callbacks:
+        callback()
+
+
+def split_lines(lines, limit=MESSAGE_LIMIT):
+    """Склеивает строки в сообщения, не длиннее лимита Telegram."""
+    chunks = []
+    current = ''
+    for line in lines:
+        for part in _split_line(line, limit):
+            if current and len(current) + 1 + len(part) > limit:
+                chunks.append(current)
+                current = ''
+            current = f'{current}\n{part}' if current else part
+    chunks.append(current)
+    return chunks
+
+
+def render_digest(messages, limit=MESSAGE_LIMIT):
+    """Собирает сообщения в одну сводку и делит её по лимиту Telegram."""
+    if len(messages) == 1:
+        return _split_line(messages[0], limit)
+    lines = [DIGEST_HEADER.format(count=len(messages))]
+    return split_lines(lines + list(messages), limit)
+
+
+class DigestBuffer:
+    """Копит сообщения каждого чата и отправляет их сводкой раз в окно.
+
+    Предоставляет тот же метод `put`, что и очередь отправки, и передаёт
+    в неё собранные сводки. Сообщения других полос, кроме смен статусов,
+    уходят в очередь сразу. С `epoch(tenant_id)` сообщения арендатора,
+    аренда которого к концу окна сменила эпоху, выбрасываются из сводки.
+    """
+
+    def __init__(self, outbox, window, limit=MESSAGE_LIMIT, epoch=None):
+        """Задаёт очередь отправки и окно сводки в секундах."""
+        self.outbox = outbox
+        self.window = window
+        self.limit = limit
+        self.epoch = epoch
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        """Возвращает число сообщений в сводках и в очереди."""
+        with self._lock:
+            buffered = sum(len(items) for _, items in self._pending.values())
+        return buffered + len(self.outbox)
+
+    def put(self, chat_id, text, tenant_id=None, lane=LANE_STATUS,
+            on_done=None):
+        """Добавляет сообщение в сводку чата.
+
+        `on_done` вызывается, когда доставлена вся сводка с сообщением.
+        """
+        if lane != LANE_STATUS:
+            self.outbox.put(chat_id, text, tenant_id, lane, on_done)
+            return
+        epoch = None
+        if self.epoch is not None and tenant_id is not None:
+            epoch = self.epoch(tenant_id)
+        with self._lock:
+            if chat_id not in self._pending:
+                deadline = time.monotonic() + self.window
+                self._pending[chat_id] = (deadline, [])
+            self._pending[chat_id][1].append(
+                (text, tenant_id, epoch, on_done)
+            )
+
+    def _current(self, tenant_id, epoch):
+        if self.epoch is None or tenant_id is None:
+            return True
+        current = self.epoch(tenant_id)
+        # Неподтверждённую аренду проверит очередь отправки.
+        return current is None or current == epoch
+
+    def flush(self, force=False):
+        """Отправляет в очередь сводки, окно которых истекло."""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                chat_id for chat_id, entry in self._pending.items()
+                if force or entry[0] <= now
+            ]
+            batches = [
+                (chat_id, self._pending.pop(chat_id)[1]) for chat_id in due
+            ]
+        for chat_id, items in batches:
+            items = [item for item in items if self._current(*item[1:3])]
+            if items:
+                self._send(chat_id, items)
+
+    def _send(self, chat_id, items):
+        chunks = render_digest([item[0] for item in items], self.limit)
+        callbacks = [item[3] for item in items if item[3] is not None]
+        countdown = Countdown(
+            len(chunks), functools.partial(_call_all, callbacks)
+        )
+        tenant_id = items[0][1]
+        for text in chunks:
+            self.outbox.put(
+                chat_id, text, tenant_id, LANE_STATUS, countdown.done
+            )
+
+    def _run(self):
+        while not self._stopped.wait(min(1, self.window)):
+            self.flush()
+        self.flush(force=True)
+
+    def start(self):
+        """Запускает фоновую отправку сводок."""
+        self._thread = threading.Thread(
+            target=self._run, name='digest', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=0):
+        """Отправляет накопленные сводки и останавливает очередь.
+
+        Сводки уходят в очередь, не дожидаясь окна, а очередь до
+        `timeout` секунд досылает их, как в `Outbox.stop`.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(force=True)
+        self.outbox.stop(timeout)
@@ -24,4 +24,18 @@ class StatusException(Exception):
 class JsonException(Exception):
     """Исключение при сериализации в json."""
 
-    pass
\ No newline at end of file
+    pass
+
+
+class DeadlineException(Exception):
+    """Исключение при исчерпании бюджета времени цикла опроса."""
+
+    pass
+
+
+class CircuitOpenException(Exception):
+    """Исключение при обращении к отключённой зависимости."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
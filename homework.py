@@ -1,66 +1,244 @@
+import asyncio
+import atexit
+import functools
+import itertools
 import logging
 import os
+import signal
 import sys
+import threading
 import time
 from http import HTTPStatus
 
-import requests
 import telegram
 from dotenv import load_dotenv
+from telegram.utils.request import Request
 
 import exceptions
+import metrics
+import tracing
+from alerts import ErrorAggregator
+from api_client import PracticumClient, deadline
+from breakers import BreakerRegistry, SharedBreaker
+from budget import FairBudget
+from capture import CaptureWriter
+from commands import CommandListener
+from diff import StatusDiff
+from digest import DigestBuffer, render_digest, split_lines
+from leases import LeaseKeeper, LeaseStore, default_holder
+from logs import current_cycle, setup_logging
+from outbox import (LANE_COMMAND, LANE_ERROR, LANE_INFO, LANE_STATUS,
+                    Countdown, Outbox, broadcast, current_chat)
+from policies import AdaptivePolicy, FixedPolicy
+from scheduler import PollScheduler
+from sharding import Supervisor
+from state import StateStore
+from streaming import StreamingResponse
+from tenants import Tenant, current_tenant, load_tenants
+from validation import Quarantine, Schema, validate_batch
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
-
-RETRY_TIME = 600
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+TELEGRAM_SUBSCRIBERS = os.getenv('TELEGRAM_SUBSCRIBERS', '')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+STATE_FILE = os.getenv('STATE_FILE', 'state.db')
+
+RETRY_TIME = int(os.getenv('RETRY_TIME', 600))
+FAST_RETRY_TIME = int(os.getenv('FAST_RETRY_TIME', 120))
+MAX_RETRY_TIME = int(os.getenv('MAX_RETRY_TIME', 3600))
+POLL_POLICY = os.getenv('POLL_POLICY', 'adaptive')
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', 0))
+POLL_ALIGNED = os.getenv('POLL_ALIGNED', '1') == '1'
+POLL_STARTUP_JITTER = os.getenv('POLL_STARTUP_JITTER', '1') == '1'
+TELEGRAM_RATE_LIMIT = float(os.getenv('TELEGRAM_RATE_LIMIT', 30))
+TELEGRAM_CHAT_RATE_LIMIT = float(os.getenv('TELEGRAM_CHAT_RATE_LIMIT', 1))
+TELEGRAM_MAX_ATTEMPTS = int(os.getenv('TELEGRAM_MAX_ATTEMPTS', 5))
+TELEGRAM_WORKERS = int(os.getenv('TELEGRAM_WORKERS', 4))
+BOT_COMMANDS = os.getenv('BOT_COMMANDS', '0') == '1'
+COMMANDS_TIMEOUT = int(os.getenv('COMMANDS_TIMEOUT', 30))
+BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', 5))
+BREAKER_RESET_TIME = float(os.getenv('BREAKER_RESET_TIME', 300))
+ERROR_WINDOW = int(os.getenv('ERROR_WINDOW', 3600))
+ERROR_CACHE_SIZE = int(os.getenv('ERROR_CACHE_SIZE', 100))
+CAPTURE_FILE = os.getenv('CAPTURE_FILE')
+QUARANTINE_FILE = os.getenv('QUARANTINE_FILE', 'quarantine.jsonl')
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER')
+TRACE_FILE = os.getenv('TRACE_FILE', 'trace.json')
+PROFILE_DIR = os.getenv('PROFILE_DIR')
+PROFILE_EVERY = int(os.getenv('PROFILE_EVERY', 100))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 50))
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+LOG_FILE = os.getenv('LOG_FILE', 'main.log')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 2 ** 20))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+DIGEST_MODE = os.getenv('DIGEST_MODE', '0') == '1'
+DIGEST_WINDOW = float(os.getenv('DIGEST_WINDOW', 0))
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 20))
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+WORKERS = int(os.getenv('WORKERS', 1))
+LEASE_TTL = float(os.getenv('LEASE_TTL', 0))
+LEASE_HOLDER = os.getenv('LEASE_HOLDER')
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 3.05))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 10))
+CYCLE_BUDGET = float(os.getenv('CYCLE_BUDGET', 30))
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', '0') == '1'
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64 * 1024))
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/',
+)
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
+api_client = PracticumClient(
+    API_CONNECT_TIMEOUT, API_READ_TIMEOUT, pool_size=MAX_CONCURRENCY
+)
+api_breaker = SharedBreaker(
+    'API Практикума', BREAKER_THRESHOLD, BREAKER_RESET_TIME
+)
+api_breakers = BreakerRegistry(
+    'API Практикума', BREAKER_THRESHOLD, BREAKER_RESET_TIME
+)
+telegram_breaker = SharedBreaker(
+    'Telegram', BREAKER_THRESHOLD, BREAKER_RESET_TIME
+)
+telegram_breakers = BreakerRegistry(
+    'Telegram', BREAKER_THRESHOLD, BREAKER_RESET_TIME
+)
+cycle_counter = itertools.count(1)
+delivery_lock = threading.Lock()
+capture = None
+
+api_latency = metrics.Histogram(
+    'homework_api_request_seconds', 'Длительность get_api_answer, с'
+)
+send_latency = metrics.Histogram(
+    'homework_send_message_seconds', 'Длительность send_message, с'
+)
+error_counter = metrics.Counter(
+    'homework_errors_total', 'Ошибки по типам исключений', ['exception']
+)
+cycle_homeworks = metrics.Histogram(
+    'homework_cycle_homeworks', 'Домашних работ в ответе API за цикл',
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 500),
+)
+quarantine_counter = metrics.Counter(
+    'homework_quarantined_total', 'Отбракованные работы по причинам',
+    ['reason'],
+)
+quarantine = Quarantine(counter=quarantine_counter)
+
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+COMMANDS_HELP = (
+    'Команды:\n'
+    '/status — текущие статусы работ\n'
+    '/history — последние изменения статусов'
+)
+NOT_SUBSCRIBED = 'Этот чат не подписан на уведомления о домашних работах.'
+HOMEWORK_SCHEMA = Schema({
+    'homework_name': str,
+    'status': (str, HOMEWORK_VERDICTS),
+})
 
 
 def send_message(bot, message):
     """Отправляет сообщение в чат Telegram."""
+    chat_id = current_chat.get()
+    if chat_id is None:
+        chat_id = TELEGRAM_CHAT_ID
+    breaker = telegram_breakers.get(chat_id)
     try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        with telegram_breaker.guard(chat_id), breaker:
+            bot.send_message(chat_id=chat_id, text=message)
         logger.info('Сообщение успешно отправлено')
     except Exception as error:
         message = f'Не удалось отправить сообщение {error}'
-        raise exceptions.SendMessageException(message)
+        raise exceptions.SendMessageException(message) from error
 
 
-def get_api_answer(current_timestamp):
-    """Делает запрос к эндпоинту ЯП."""
+def deliver(bot, chat_id, message):
+    """Отправляет сообщение из очереди в указанный чат."""
+    token = current_chat.set(chat_id)
+    try:
+        with tracing.span('send_message'), send_latency.time():
+            send_message(bot, message)
+    except Exception as error:
+        error_counter.inc(type(error).__name__)
+        raise
+    finally:
+        current_chat.reset(token)
+
+
+def call_api(current_timestamp, tenant_id, headers, stream=False):
+    """Выполняет запрос к эндпоинту ЯП и проверяет статус ответа."""
     params = {'from_date': current_timestamp}
     try:
-        answer = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        answer = api_client.get(
+            ENDPOINT, headers=headers, params=params, stream=stream
+        )
 
     except Exception as error:
-        error_message = f'Не удалось получить доступ к API: {error}, {params}'
+        error_message = (
+            f'Не удалось получить доступ к API: {error}, {params}'
+        )
         raise exceptions.GetAPIException(error_message)
 
-    else:
-        if answer.status_code != HTTPStatus.OK:
-            status = answer.raise_for_status()
-            error_message = f'Неверный статус ответа: {status}'
-            raise exceptions.GetAPIException(error_message)
+    if capture is not None and not stream:
+        capture.write(
+            tenant_id, current_timestamp, answer.status_code, answer.text
+        )
+    if answer.status_code != HTTPStatus.OK:
+        status = answer.raise_for_status()
+        error_message = f'Неверный статус ответа: {status}'
+        raise exceptions.GetAPIException(error_message)
+    return answer
 
-        try:
+
+def request_api(current_timestamp, stream=False):
+    """Запрашивает эндпоинт ЯП через общий предохранитель и арендатора."""
+    tenant = current_tenant.get()
+    headers = HEADERS if tenant is None else tenant.headers
+    tenant_id = None if tenant is None else tenant.tenant_id
+    try:
+        with api_breaker.guard(tenant_id), api_breakers.get(tenant_id):
+            return call_api(current_timestamp, tenant_id, headers, stream)
+    except exceptions.CircuitOpenException as error:
+        raise exceptions.GetAPIException(
+            f'Не удалось получить доступ к API: {error}'
+        ) from error
+
+
+def get_api_answer(current_timestamp):
+    """Делает запрос к эндпоинту ЯП."""
+    answer = request_api(current_timestamp)
+    try:
+        with tracing.span('json_decode'):
             return answer.json()
 
-        except Exception as error:
-            error_message = f'Ошибка сериализации в json: {error}'
-            raise exceptions.JsonException(error_message)
+    except Exception as error:
+        error_message = f'Ошибка сериализации в json: {error}'
+        raise exceptions.JsonException(error_message)
+
+
+def get_api_stream(current_timestamp):
+    """Делает запрос к эндпоинту ЯП, не читая тело ответа целиком."""
+    answer = request_api(current_timestamp, stream=True)
+    return StreamingResponse(
+        api_client.iter_content(answer, STREAM_CHUNK_SIZE)
+    )
 
 
 def check_response(response):
@@ -77,6 +255,21 @@ def check_response(response):
     return homework_list
 
 
+def check_stream(stream):
+    """Выдаёт работы из потокового ответа API по одной."""
+    try:
+        yield from stream.homeworks()
+    except ValueError as error:
+        error_message = f'Ошибка сериализации в json: {error}'
+        raise exceptions.JsonException(error_message)
+    if stream.has_list:
+        return
+    if 'homeworks' not in stream.fields:
+        raise KeyError('В словаре нет ключа homeworks')
+    error_message = 'Домашние работы в ответе API выводятся не списком'
+    raise exceptions.APIResponseException(error_message)
+
+
 def parse_status(homework):
     """Получает статус домашней работы."""
     try:
@@ -92,60 +285,519 @@ def parse_status(homework):
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
+def get_next_timestamp(response, current_timestamp):
+    """Возвращает курсор следующего запроса по current_date ответа API."""
+    current_date = response.get('current_date')
+    if type(current_date) is not int:
+        logger.warning(f'Некорректный current_date в ответе: {current_date}')
+        return current_timestamp
+    if current_date < current_timestamp:
+        logger.warning(
+            f'current_date {current_date} меньше курсора {current_timestamp}'
+        )
+        return current_timestamp
+    return current_date
+
+
 def check_tokens():
     """Проверяет наличие переменных окружения."""
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
+def report_error(outbox, errors, tenant, error):
+    """Сообщает о новой ошибке, повторы только подсчитывает."""
+    error_counter.inc(type(error).__name__)
+    if errors.record(tenant.tenant_id, error):
+        message = f'Сбой в работе программы: {error}'
+        outbox.put(tenant.chat_id, message, tenant.tenant_id, LANE_ERROR)
+        logger.exception(f'Возникла ошибка: {error}')
+    else:
+        logger.debug(f'Повтор ошибки: {error}')
+
+
+def fetch_homeworks(tenant):
+    """Возвращает работы из ответа API и сам ответ для чтения курсора.
+
+    При STREAM_RESPONSES работы читаются из ответа по мере обхода.
+    """
+    with tracing.span('get_api_answer'), api_latency.time():
+        if STREAM_RESPONSES:
+            api_response = get_api_stream(tenant.from_date)
+        else:
+            api_response = get_api_answer(tenant.from_date)
+    if STREAM_RESPONSES:
+        return check_stream(api_response), api_response
+    with tracing.span('check_response'):
+        return check_response(api_response), api_response
+
+
+def save_delivered(store, tenant, items):
+    """Сохраняет статусы доставленного уведомления.
+
+    Курсор сохраняется, только когда у арендатора не осталось
+    недоставленных уведомлений, иначе после перезапуска они потеряются.
+    """
+    for item in items:
+        store.set_status(
+            tenant.tenant_id, item['homework_name'], item['status']
+        )
+    with delivery_lock:
+        # После смены аренды счётчик обнулён, а старая доставка ещё могла
+        # завершиться.
+        tenant.unsent = max(tenant.unsent - 1, 0)
+        idle = tenant.unsent == 0
+    if idle:
+        store.set_cursor(tenant.tenant_id, tenant.from_date)
+
+
+def queue_status(outbox, store, tenant, messages, items):
+    """Рассылает уведомление подписчикам арендатора.
+
+    Статусы `items` сохраняются после доставки всех `messages` во все чаты.
+    """
+    with delivery_lock:
+        tenant.unsent += 1
+    countdown = Countdown(
+        len(messages) * len(tenant.chat_ids),
+        functools.partial(save_delivered, store, tenant, items),
+    )
+    for message in messages:
+        broadcast(
+            outbox, tenant.chat_ids, message, tenant.tenant_id, LANE_STATUS,
+            countdown.done,
+        )
+
+
+def run_cycle(outbox, store, diff, tenant):
+    """Запрашивает API и ставит в очередь уведомления о сменах статусов."""
+    homeworks, api_response = fetch_homeworks(tenant)
+    valid = validate_batch(
+        homeworks, HOMEWORK_SCHEMA, quarantine, tenant.tenant_id
+    )
+    digest = DIGEST_MODE and not DIGEST_WINDOW
+    changed, pending, messages = 0, [], []
+    with tracing.span('parse_status'):
+        for item in diff.iter_changes(tenant.tenant_id, valid):
+            message = parse_status(item)
+            changed += 1
+            if digest:
+                pending.append(item)
+                messages.append(message)
+                continue
+            diff.mark(tenant.tenant_id, item)
+            queue_status(outbox, store, tenant, [message], [item])
+    if messages:
+        for item in pending:
+            diff.mark(tenant.tenant_id, item)
+        queue_status(outbox, store, tenant, render_digest(messages), pending)
+    count = api_response.count if STREAM_RESPONSES else len(homeworks)
+    cycle_homeworks.observe(count)
+    logger.info(f'Список домашних работ получен {count}')
+    tenant.from_date = get_next_timestamp(api_response, tenant.from_date)
+    with delivery_lock:
+        idle = tenant.unsent == 0
+    if idle:
+        store.set_cursor(tenant.tenant_id, tenant.from_date)
+    tenant.idle = 0 if changed else tenant.idle + 1
+    tenant.reviewing = diff.has_status(tenant.tenant_id, 'reviewing')
+
+
+def poll_tenant(outbox, store, diff, errors, tenant):
+    """Выполняет один цикл опроса API для арендатора."""
+    cycle = next(cycle_counter)
+    token = current_tenant.set(tenant)
+    cycle_token = current_cycle.set(cycle)
+    for summary in errors.summaries(tenant.tenant_id):
+        outbox.put(tenant.chat_id, summary, tenant.tenant_id, LANE_INFO)
+        logger.warning(summary)
+    try:
+        profile = tracing.profiled(
+            PROFILE_DIR, f'cycle-{tenant.tenant_id}-{cycle}',
+            every=PROFILE_EVERY, max_files=PROFILE_MAX_FILES,
+        )
+        with profile, tracing.span('cycle'):
+            with deadline(CYCLE_BUDGET):
+                run_cycle(outbox, store, diff, tenant)
+        tenant.errors = 0
+
+    except Exception as error:
+        tenant.errors += 1
+        report_error(outbox, errors, tenant, error)
+
+    finally:
+        current_cycle.reset(cycle_token)
+        current_tenant.reset(token)
+
+
+def tenant_epoch(leases, tenant_id):
+    """Возвращает эпоху аренды арендатора или None."""
+    return leases.epoch(f'tenant:{tenant_id}')
+
+
+def poll_leased(leases, store, diff, poll, tenant):
+    """Опрашивает арендатора, только пока реплика держит его аренду.
+
+    После нового захвата аренды снимок статусов и курсор перечитываются
+    из хранилища: их могла продвинуть другая реплика. Уведомления,
+    поставленные в очередь при прошлой аренде, очередь отбрасывает.
+    """
+    epoch = tenant_epoch(leases, tenant.tenant_id)
+    if epoch is None:
+        tenant.lease_epoch = None
+        logger.debug(f'Аренда {tenant} у другой реплики, опрос пропущен')
+        return
+    if tenant.lease_epoch != epoch:
+        tenant.lease_epoch = epoch
+        diff.forget(tenant.tenant_id)
+        tenant.from_date = store.get_cursor(tenant.tenant_id)
+        with delivery_lock:
+            tenant.unsent = 0
+    poll(tenant)
+
+
+def chat_tenants(tenants):
+    """Сопоставляет чатам арендаторов, на которых они подписаны."""
+    chats = {}
+    for tenant in tenants:
+        for chat_id in tenant.chat_ids:
+            chats.setdefault(str(chat_id), []).append(tenant)
+    return chats
+
+
+def render_status(diff, tenant):
+    """Возвращает строки с текущими статусами работ арендатора."""
+    statuses = diff.statuses(tenant.tenant_id)
+    return [
+        f'{name}: {HOMEWORK_VERDICTS.get(status, status)}'
+        for name, status in sorted(statuses.items())
+    ]
+
+
+def render_history(diff, tenant):
+    """Возвращает строки с последними сменами статусов, новые сверху."""
+    return [
+        f'{time.strftime("%d.%m %H:%M", time.localtime(changed_at))} '
+        f'{name}: {HOMEWORK_VERDICTS.get(status, status)}'
+        for changed_at, name, status in reversed(diff.history(
+            tenant.tenant_id
+        ))
+    ]
+
+
+def answer_command(chats, render, title, chat_id, args):
+    """Отвечает на команду по снимку статусов, не обращаясь к API."""
+    tenants = chats.get(str(chat_id))
+    if not tenants:
+        return NOT_SUBSCRIBED
+    lines = [title]
+    for tenant in tenants:
+        if len(tenants) > 1:
+            lines.append(f'{tenant.tenant_id}:')
+        lines.extend(render(tenant) or ['Пока нет данных.'])
+    return '\n'.join(lines)
+
+
+def reply_command(outbox, chat_id, text):
+    """Ставит ответ на команду в очередь, деля его по лимиту Telegram."""
+    for chunk in split_lines(text.split('\n')):
+        outbox.put(chat_id, chunk, None, LANE_COMMAND)
+
+
+def start_commands(bot, outbox, diff, tenants):
+    """Запускает приём команд /status и /history."""
+    chats = chat_tenants(tenants)
+    handlers = {
+        'status': functools.partial(
+            answer_command, chats, functools.partial(render_status, diff),
+            'Статусы работ:',
+        ),
+        'history': functools.partial(
+            answer_command, chats, functools.partial(render_history, diff),
+            'Последние изменения статусов:',
+        ),
+        'start': lambda chat_id, args: COMMANDS_HELP,
+        'help': lambda chat_id, args: COMMANDS_HELP,
+        None: lambda chat_id, args: COMMANDS_HELP,
+    }
+    listener = CommandListener(
+        bot, handlers, functools.partial(reply_command, outbox),
+        timeout=COMMANDS_TIMEOUT,
+    )
+    listener.start()
+    return listener
+
+
+def get_tracing_exporter(trace_file=TRACE_FILE):
+    """Возвращает экспортёр трассировки по TRACE_EXPORTER."""
+    if TRACE_EXPORTER == 'log':
+        return tracing.LogExporter()
+    if TRACE_EXPORTER == 'ring':
+        return tracing.RingBufferExporter()
+    if TRACE_EXPORTER == 'chrome':
+        return tracing.ChromeTraceExporter(trace_file)
+    return None
+
+
+def get_tenants():
+    """Возвращает реестр арендаторов из TENANTS_FILE или окружения."""
+    if TENANTS_FILE:
+        return load_tenants(TENANTS_FILE)
+    subscribers = [
+        chat_id.strip() for chat_id in TELEGRAM_SUBSCRIBERS.split(',')
+        if chat_id.strip()
+    ]
+    return [
+        Tenant('default', PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, subscribers)
+    ]
+
+
+def get_policy(tenants_count, share=1):
+    """Возвращает политику выбора времени следующего опроса."""
+    if POLL_POLICY == 'fixed':
+        return FixedPolicy(RETRY_TIME)
+    return AdaptivePolicy(
+        RETRY_TIME, FAST_RETRY_TIME, MAX_RETRY_TIME,
+        rate_limit=API_RATE_LIMIT * share, tenants_count=tenants_count,
+    )
+
+
+def enable_capture(path):
+    """Включает запись сырых ответов API в журнал."""
+    global capture
+    capture = CaptureWriter(path)
+    atexit.register(capture.close)
+
+
+def enable_quarantine(path):
+    """Включает запись отбракованных работ в журнал карантина."""
+    global quarantine
+    quarantine = Quarantine(path, quarantine_counter)
+
+
+def worker_path(path, worker_id):
+    """Возвращает путь к файлу воркера: main.log -> main.1.log."""
+    if worker_id is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}.{worker_id}{ext}'
+
+
+def configure_journals(worker_id=None):
+    """Включает трассировку, профилирование и журналы из окружения."""
+    tracing.configure(
+        get_tracing_exporter(worker_path(TRACE_FILE, worker_id))
+    )
+    if CAPTURE_FILE:
+        enable_capture(worker_path(CAPTURE_FILE, worker_id))
+    if QUARANTINE_FILE:
+        enable_quarantine(worker_path(QUARANTINE_FILE, worker_id))
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+
+
+def create_bot():
+    """Создаёт бота с пулом соединений на все потоки отправки."""
+    return telegram.Bot(
+        token=TELEGRAM_TOKEN,
+        base_url=TELEGRAM_API_URL,
+        request=Request(con_pool_size=TELEGRAM_WORKERS + 2),
+    )
+
+
+def create_pipeline(bot, store, tenants, share=1, leases=None,
+                    commands=False):
+    """Собирает очередь отправки и планировщик опросов арендаторов.
+
+    `share` — доля общих лимитов API и Telegram, доставшаяся процессу.
+    С `leases` опрашиваются только арендаторы, аренду которых держит
+    реплика. С `commands` бот отвечает на команды по снимку статусов.
+    """
+    epoch = None
+    if leases is not None:
+        epoch = functools.partial(tenant_epoch, leases)
+    outbox = Outbox(
+        functools.partial(deliver, bot),
+        store.add_dead_letter,
+        rate=TELEGRAM_RATE_LIMIT * share,
+        chat_rate=TELEGRAM_CHAT_RATE_LIMIT,
+        max_attempts=TELEGRAM_MAX_ATTEMPTS,
+        workers=TELEGRAM_WORKERS,
+        epoch=epoch,
+    )
+    outbox.start()
+    if DIGEST_MODE and DIGEST_WINDOW:
+        outbox = DigestBuffer(outbox, DIGEST_WINDOW, epoch=epoch)
+        outbox.start()
+
+    diff = StatusDiff(store)
+    poll = functools.partial(
+        poll_tenant, outbox, store, diff,
+        ErrorAggregator(ERROR_WINDOW, ERROR_CACHE_SIZE),
+    )
+    if leases is not None:
+        poll = functools.partial(poll_leased, leases, store, diff, poll)
+    if commands:
+        start_commands(bot, outbox, diff, tenants)
+    budget = None
+    if API_RATE_LIMIT:
+        budget = FairBudget(API_RATE_LIMIT * share)
+    jitter = 0
+    if POLL_STARTUP_JITTER and len(tenants) > 1:
+        jitter = RETRY_TIME
+    scheduler = PollScheduler(
+        tenants,
+        poll,
+        get_policy(len(tenants), share),
+        MAX_CONCURRENCY,
+        POLL_ALIGNED,
+        budget,
+        jitter,
+    )
+    return outbox, scheduler
+
+
+def register_metrics(scheduler, outbox):
+    """Регистрирует метрики планировщика и очереди отправки."""
+    metrics.Callback(
+        'homework_cycle_overruns_total',
+        'Циклы опроса, превысившие период',
+        lambda: scheduler.overruns, kind='counter',
+    )
+    metrics.Callback(
+        'homework_outbox_depth', 'Сообщений в очереди на отправку',
+        lambda: len(outbox),
+    )
+
+
+async def run_until_stopped(scheduler):
+    """Крутит планировщик, пока не придёт SIGTERM или SIGINT."""
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        await scheduler.run()
+    except asyncio.CancelledError:
+        logger.info('Получен сигнал остановки, досылаем очередь')
+
+
+def serve(bot, tenants, share=1, worker_id=None):
+    """Опрашивает арендаторов и рассылает уведомления до остановки."""
+    store = StateStore(STATE_FILE)
+    cursors = store.load_cursors()
+    for tenant in tenants:
+        tenant.from_date = cursors.get(tenant.tenant_id, 0)
+
+    configure_journals(worker_id)
+
+    logger.info(
+        f'Загружено арендаторов: {len(tenants)}, чатов: '
+        f'{sum(len(tenant.chat_ids) for tenant in tenants)}'
+    )
+    leases = None
+    if LEASE_TTL:
+        leases = LeaseKeeper(
+            LeaseStore(STATE_FILE),
+            [f'tenant:{tenant.tenant_id}' for tenant in tenants],
+            LEASE_HOLDER or default_holder(),
+            LEASE_TTL,
+        )
+        leases.start()
+        atexit.register(leases.stop)
+    outbox, scheduler = create_pipeline(
+        bot, store, tenants, share, leases,
+        commands=BOT_COMMANDS and worker_id is None,
+    )
+    if METRICS_PORT:
+        register_metrics(scheduler, outbox)
+        metrics.start_metrics_server(METRICS_PORT + (worker_id or 0))
+    try:
+        asyncio.run(run_until_stopped(scheduler))
+    finally:
+        outbox.stop(SHUTDOWN_TIMEOUT)
+        if capture is not None:
+            capture.close()
+
+
+def run_worker(worker_id, tenant_ids, share):
+    """Обслуживает шард арендаторов в отдельном процессе."""
+    listener = start_logging(worker_id)
+    atexit.register(listener.stop)
+    shard = set(tenant_ids)
+    tenants = [tenant for tenant in get_tenants() if tenant.tenant_id in shard]
+    serve(create_bot(), tenants, share, worker_id)
+
+
+def supervise(tenants):
+    """Раскладывает арендаторов по процессам-воркерам и следит за ними.
+
+    SIGUSR1 добавляет воркера, SIGUSR2 убирает, шарды перестраиваются.
+    SIGTERM останавливает воркеров вместе с супервизором.
+    """
+    supervisor = Supervisor(
+        run_worker, [tenant.tenant_id for tenant in tenants], WORKERS,
+        stop_timeout=SHUTDOWN_TIMEOUT + 5,
+    )
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit())
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(
+            signal.SIGUSR1,
+            lambda *args: supervisor.request_resize(supervisor.workers + 1),
+        )
+        signal.signal(
+            signal.SIGUSR2,
+            lambda *args: supervisor.request_resize(supervisor.workers - 1),
+        )
+    if BOT_COMMANDS:
+        logger.warning('Команды бота не работают при WORKERS больше 1')
+    logger.info(f'Арендаторов: {len(tenants)}, воркеров: {WORKERS}')
+    supervisor.run()
+
+
 def main():
     """Основная логика работы бота."""
-    if not check_tokens():
+    if not (check_tokens() or TENANTS_FILE and TELEGRAM_TOKEN):
         message = 'Отсутствует переменная окружения'
         logger.critical(message)
         sys.exit()
 
     try:
-        bot = telegram.Bot(token=TELEGRAM_TOKEN)
+        bot = create_bot()
 
     except Exception as error:
         message = f'Ошибка при создании бота: {error}'
         logger.critical(message)
         sys.exit()
 
-    current_timestamp = 0
-    previous_error_message = ''
+    try:
+        tenants = get_tenants()
 
-    while True:
-        try:
-            api_response = get_api_answer(current_timestamp)
-            homeworks = check_response(api_response)
-            logger.info(f'Список домашних работ получен {len(homeworks)}')
-            for item in homeworks:
-                send_message(bot, parse_status(item))
-            current_timestamp = int(time.time())
+    except Exception as error:
+        message = f'Ошибка при загрузке реестра арендаторов: {error}'
+        logger.critical(message)
+        sys.exit()
+
+    if WORKERS > 1:
+        supervise(tenants)
+    else:
+        serve(bot, tenants)
 
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            if message != previous_error_message:
-                send_message(bot, message)
-                previous_error_message = message
-            logger.exception(f'Возникла ошибка: {error}')
 
-        finally:
-            time.sleep(RETRY_TIME)
+def start_logging(worker_id=None):
+    """Настраивает логирование процесса из окружения."""
+    return setup_logging(
+        worker_path(LOG_FILE, worker_id),
+        json_format=LOG_FORMAT == 'json',
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        when=LOG_ROTATE_WHEN,
+    )
 
 
 if __name__ == '__main__':
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s, %(levelname)s, '
-               '%(name)s, %(funcName)s, '
-               '%(lineno)d, %(message)s',
-        filename='main.log',
-    )
-
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG)
-    handler = logging.StreamHandler(stream=sys.stdout)
-    logger.addHandler(handler)
+    listener = start_logging()
+    atexit.register(listener.stop)
     main()
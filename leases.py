@@ -0,0 +1,191 @@
+import itertools
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    resource TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def default_holder():
+    """Возвращает имя реплики: хост и pid процесса."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class LeaseStore:
+    """Аренды ресурсов в общей базе SQLite.
+
+    Захват и продление — атомарный upsert: запись переходит к новому
+    владельцу, только если она свободна или истекла.
+    """
+
+    def __init__(self, path):
+        """Открывает базу и создаёт таблицу аренд."""
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=5
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(SCHEMA)
+
+    def acquire(self, resource, holder, ttl):
+        """Захватывает или продлевает аренду, возвращает успех."""
+        return resource in self.acquire_many([resource], holder, ttl)
+
+    def acquire_many(self, resources, holder, ttl):
+        """Захватывает или продлевает аренды одной транзакцией.
+
+        Возвращает множество ресурсов, аренда которых теперь у holder.
+        """
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._connection.executemany(
+                    'INSERT INTO leases (resource, holder, expires_at) '
+                    'VALUES (?, ?, ?) '
+                    'ON CONFLICT (resource) DO UPDATE SET '
+                    'holder = excluded.holder, '
+                    'expires_at = excluded.expires_at '
+                    'WHERE leases.holder = excluded.holder '
+                    'OR leases.expires_at <= ?',
+                    [
+                        (resource, holder, expires_at, now)
+                        for resource in resources
+                    ],
+                )
+                rows = self._connection.execute(
+                    'SELECT resource FROM leases '
+                    'WHERE holder = ? AND expires_at = ?',
+                    (holder, expires_at),
+                ).fetchall()
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+        requested = set(resources)
+        return {resource for resource, in rows if resource in requested}
+
+    def release(self, resource, holder):
+        """Отпускает аренду, если она принадлежит holder."""
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM leases WHERE resource = ? AND holder = ?',
+                (resource, holder),
+            )
+
+    def holders(self):
+        """Возвращает действующих владельцев ресурсов."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT resource, holder FROM leases WHERE expires_at > ?',
+                (time.time(),),
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
+
+
+class LeaseKeeper:
+    """Держит аренды реплики и продлевает их фоновым пульсом.
+
+    Раз в `ttl / 3` продлевает свои аренды и пробует захватить
+    свободные или истёкшие. Ресурс считается своим, пока с последнего
+    продления прошло меньше `ttl` минус запас на пульс, поэтому
+    зависшая реплика перестаёт работать раньше, чем её аренду заберут.
+    Каждый новый захват получает свою эпоху: по её смене вызывающий код
+    узнаёт, что ресурс мог обрабатываться другой репликой.
+    """
+
+    def __init__(self, store, resources, holder=None, ttl=15):
+        """Задаёт ресурсы реплики и время жизни аренды."""
+        self.store = store
+        self.resources = list(resources)
+        self.holder = holder or default_holder()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._held = {}
+        self._epochs = itertools.count(1)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _update(self, resource, acquired, renewed_at):
+        with self._lock:
+            held = self._held.get(resource)
+            if not acquired:
+                if held is not None:
+                    del self._held[resource]
+                    logger.warning(f'Аренда {resource} перешла другой реплике')
+                return
+            # Аренда могла истечь между продлениями и побывать у другой
+            # реплики: такой захват тоже считается новым.
+            if held is None or renewed_at - held[1] >= self.ttl:
+                held = (next(self._epochs), renewed_at)
+                logger.info(f'Аренда {resource} захвачена {self.holder}')
+            self._held[resource] = (held[0], renewed_at)
+
+    def heartbeat(self):
+        """Продлевает свои аренды и захватывает свободные.
+
+        Все аренды продлеваются одной транзакцией, чтобы пульс не
+        растягивался на тысячах ресурсов.
+        """
+        renewed_at = time.monotonic()
+        try:
+            acquired = self.store.acquire_many(
+                self.resources, self.holder, self.ttl
+            )
+        except sqlite3.Error as error:
+            logger.warning(f'Ошибка продления аренд: {error}')
+            return
+        for resource in self.resources:
+            self._update(resource, resource in acquired, renewed_at)
+
+    def epoch(self, resource):
+        """Возвращает эпоху действующей аренды ресурса или None."""
+        deadline = self.ttl * 2 / 3
+        with self._lock:
+            held = self._held.get(resource)
+        if held is None or time.monotonic() - held[1] >= deadline:
+            return None
+        return held[0]
+
+    def owns(self, resource):
+        """Проверяет, что реплика держит аренду ресурса."""
+        return self.epoch(resource) is not None
+
+    def _run(self):
+        while not self._stopped.wait(self.ttl / 3):
+            self.heartbeat()
+
+    def start(self):
+        """Захватывает аренды и запускает фоновый пульс."""
+        self.heartbeat()
+        self._thread = threading.Thread(
+            target=self._run, name='leases', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает пульс и отпускает свои аренды."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            held, self._held = self._held, {}
+        for resource in held:
+            self.store.release(resource, self.holder)
@@ -0,0 +1,106 @@
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+from tenants import current_tenant
+
+current_cycle = contextvars.ContextVar('current_cycle', default=None)
+
+TEXT_FORMAT = (
+    '%(asctime)s, %(levelname)s, %(name)s, %(funcName)s, '
+    '%(lineno)d, %(tenant)s, %(cycle)s, %(message)s'
+)
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет в запись арендатора и номер цикла опроса."""
+
+    def filter(self, record):
+        """Дополняет запись полями tenant и cycle."""
+        tenant = current_tenant.get()
+        record.tenant = '-' if tenant is None else tenant.tenant_id
+        record.cycle = current_cycle.get()
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Кладёт запись в очередь, не форматируя трассировку исключения.
+
+    Стандартный QueueHandler форматирует запись вместе с трассировкой
+    в вызывающем потоке и убирает exc_info. Здесь подставляются только
+    аргументы сообщения, а трассировку форматирует обработчик в потоке
+    QueueListener.
+    """
+
+    def prepare(self, record):
+        """Готовит копию записи для очереди."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как одну строку JSON."""
+
+    def format(self, record):
+        """Возвращает запись в виде JSON."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+            'line': record.lineno,
+            'tenant': getattr(record, 'tenant', None),
+            'cycle': getattr(record, 'cycle', None),
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def _file_handler(filename, max_bytes, backup_count, when):
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            filename, when=when, backupCount=backup_count, encoding='utf-8'
+        )
+    return logging.handlers.RotatingFileHandler(
+        filename, maxBytes=max_bytes, backupCount=backup_count,
+        encoding='utf-8',
+    )
+
+
+def setup_logging(filename, json_format=False, max_bytes=10 * 2 ** 20,
+                  backup_count=5, when=None, level=logging.INFO):
+    """Настраивает логирование через очередь и фоновый поток записи.
+
+    Обработчики файла и stdout работают в потоке QueueListener, так что
+    вызовы логгера в цикле опроса только кладут запись в очередь, а
+    трассировки исключений форматируются уже в потоке записи.
+    Возвращает запущенный listener, который нужно остановить при выходе.
+    """
+    formatter = (
+        JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    )
+    file_handler = _file_handler(filename, max_bytes, backup_count, when)
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler(stream=sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    return listener
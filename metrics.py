@@ -0,0 +1,168 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{value}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class Registry:
+    """Набор метрик, отдаваемых в текстовом формате Prometheus."""
+
+    def __init__(self):
+        """Создаёт пустой реестр метрик."""
+        self._metrics = []
+
+    def register(self, metric):
+        """Добавляет метрику в набор."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    """Монотонный счётчик с необязательными метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 registry=REGISTRY):
+        """Создаёт счётчик с заданными метками."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, *labels, amount=1):
+        """Увеличивает счётчик для набора меток."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        """Возвращает текущее значение счётчика."""
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        """Строки значений метрики."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f'{self.name}{_labels(self.labelnames, labels)} {value}'
+            for labels, value in items
+        ]
+
+
+class Histogram:
+    """Гистограмма наблюдений с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS,
+                 registry=REGISTRY):
+        """Создаёт гистограмму с заданными границами корзин."""
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value):
+        """Учитывает одно наблюдение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Измеряет длительность блока в секундах."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self):
+        """Строки значений метрики."""
+        with self._lock:
+            counts, total = self._counts[:], self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_sum {total}')
+        lines.append(f'{self.name}_count {cumulative}')
+        return lines
+
+
+class Callback:
+    """Метрика, значение которой вычисляется при каждом запросе."""
+
+    def __init__(self, name, documentation, function, kind='gauge',
+                 registry=REGISTRY):
+        """Создаёт метрику, значение которой читает `function`."""
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.kind = kind
+        registry.register(self)
+
+    def samples(self):
+        """Строки значений метрики."""
+        return [f'{self.name} {self.function()}']
+
+
+def start_metrics_server(port, registry=REGISTRY, host='127.0.0.1'):
+    """Запускает в фоне HTTP-сервер, отдающий метрики по /metrics."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            body = registry.render().encode()
+            self.send_response(HTTPStatus.OK)
+            self.send_header(
+                'Content-Type', 'text/plain; version=0.0.4; charset=utf-8'
+            )
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    )
+    thread.start()
+    return server
@@ -0,0 +1,342 @@
+import collections
+import contextvars
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+current_chat = contextvars.ContextVar('current_chat', default=None)
+
+LANE_COMMAND = 0
+LANE_STATUS = 1
+LANE_ERROR = 2
+LANE_INFO = 3
+LANES = (LANE_COMMAND, LANE_STATUS, LANE_ERROR, LANE_INFO)
+PARK_TIME = 1
+
+
+class TokenBucket:
+    """Ограничитель частоты по алгоритму token bucket."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity=1):
+        """Создаёт ограничитель с полным запасом токенов."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self):
+        """Возвращает, сколько секунд ждать до свободного токена."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Забирает один токен."""
+        self.tokens -= 1
+
+
+class Message:
+    """Сообщение в очереди на отправку."""
+
+    __slots__ = ('chat_id', 'text', 'tenant_id', 'lane', 'attempts', 'seq',
+                 'on_done', 'epoch')
+
+    def __init__(self, chat_id, text, tenant_id=None, lane=LANE_INFO,
+                 seq=0, on_done=None, epoch=None):
+        """Создаёт сообщение без попыток отправки."""
+        self.chat_id = chat_id
+        self.text = text
+        self.tenant_id = tenant_id
+        self.lane = lane
+        self.attempts = 0
+        self.seq = seq
+        self.on_done = on_done
+        self.epoch = epoch
+
+
+class Countdown:
+    """Вызывает callback, когда завершатся все `count` доставок."""
+
+    def __init__(self, count, callback):
+        """Задаёт число ожидаемых доставок и callback."""
+        self.count = count
+        self.callback = callback
+        self._lock = threading.Lock()
+
+    def done(self):
+        """Отмечает одну завершённую доставку."""
+        with self._lock:
+            self.count -= 1
+            finished = self.count == 0
+        if finished:
+            self.callback()
+
+
+class FairQueue:
+    """Очередь, которая по кругу выдаёт сообщения разных арендаторов.
+
+    Сообщения одного арендатора выдаются в порядке постановки, даже если
+    часть из них возвращается после отложенной отправки.
+    """
+
+    def __init__(self):
+        """Создаёт пустую очередь."""
+        self._queues = collections.OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        """Возвращает число сообщений в очереди."""
+        return self._size
+
+    def append(self, message):
+        """Добавляет сообщение в очередь его арендатора."""
+        queue = self._queues.get(message.tenant_id)
+        if queue is None:
+            queue = self._queues[message.tenant_id] = []
+        heapq.heappush(queue, (message.seq, message))
+        self._size += 1
+
+    def popleft(self):
+        """Забирает сообщение арендатора, чья очередь подошла."""
+        tenant_id, queue = self._queues.popitem(last=False)
+        _, message = heapq.heappop(queue)
+        if queue:
+            self._queues[tenant_id] = queue
+        self._size -= 1
+        return message
+
+
+class Outbox:
+    """Очередь исходящих сообщений Telegram с ограничением частоты.
+
+    Сообщения отправляют фоновые потоки с учётом общего лимита и лимита
+    на чат. Сначала уходят ответы на команды, затем смены статусов,
+    ошибки и прочие сообщения; внутри полосы арендаторы обслуживаются
+    по кругу.
+    Неудачные отправки повторяются с экспоненциальной паузой, а после
+    `max_attempts` попыток уходят в `dead_letter`. Когда сообщение
+    отправлено или сохранено в `dead_letter`, вызывается его `on_done`.
+
+    С `epoch(tenant_id)` сообщение арендатора запоминает эпоху его
+    аренды при постановке в очередь. Если к отправке эпоха сменилась,
+    сообщение отбрасывается без `on_done`: его отправит реплика, которая
+    теперь держит аренду. Пока аренда не подтверждена, сообщение ждёт.
+    """
+
+    def __init__(self, send, dead_letter, rate=30, chat_rate=1,
+                 max_attempts=5, workers=4, max_chats=10000, epoch=None):
+        """Задаёт отправку, лимиты и число потоков."""
+        self.send = send
+        self.dead_letter = dead_letter
+        self.max_attempts = max_attempts
+        self.workers = workers
+        self.max_chats = max_chats
+        self.epoch = epoch
+        self._limiter = TokenBucket(rate, rate)
+        self._chat_rate = chat_rate
+        self._chat_limiters = collections.OrderedDict()
+        self._blocked = {}
+        self._lanes = [FairQueue() for _ in LANES]
+        self._delayed = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._sending = 0
+        self._threads = []
+
+    def __len__(self):
+        """Возвращает число неотправленных сообщений."""
+        with self._condition:
+            ready = sum(len(lane) for lane in self._lanes)
+            return ready + len(self._delayed)
+
+    def put(self, chat_id, text, tenant_id=None, lane=LANE_INFO,
+            on_done=None):
+        """Ставит сообщение в очередь, не дожидаясь отправки."""
+        epoch = None
+        if self.epoch is not None and tenant_id is not None:
+            epoch = self.epoch(tenant_id)
+        with self._condition:
+            message = Message(
+                chat_id, text, tenant_id, lane, next(self._counter), on_done,
+                epoch,
+            )
+            self._lanes[lane].append(message)
+            self._condition.notify()
+
+    def _pop_ready(self):
+        for lane in self._lanes:
+            if lane:
+                return lane.popleft()
+        return None
+
+    def _delay(self, message, when):
+        heapq.heappush(
+            self._delayed, (when, message.lane, message.seq, message)
+        )
+
+    def _chat_limiter(self, chat_id):
+        limiter = self._chat_limiters.pop(chat_id, None)
+        if limiter is None:
+            limiter = TokenBucket(self._chat_rate)
+            if len(self._chat_limiters) >= self.max_chats:
+                self._chat_limiters.popitem(last=False)
+        self._chat_limiters[chat_id] = limiter
+        return limiter
+
+    def _reserve(self, message):
+        chat_limiter = self._chat_limiter(message.chat_id)
+        wait = max(chat_limiter.wait_time(), self._limiter.wait_time())
+        if not wait:
+            chat_limiter.take()
+            self._limiter.take()
+        return wait
+
+    def _current(self, message, now):
+        if self.epoch is None or message.tenant_id is None:
+            return True
+        epoch = self.epoch(message.tenant_id)
+        if epoch is None:
+            self._delay(message, now + PARK_TIME)
+            return False
+        if epoch != message.epoch:
+            logger.warning(
+                f'Сообщение в чат {message.chat_id} отброшено: аренда '
+                f'арендатора {message.tenant_id} перешла другой реплике'
+            )
+            return False
+        return True
+
+    def _take(self):
+        with self._condition:
+            while not self._stopped:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    message = heapq.heappop(self._delayed)[-1]
+                    self._lanes[message.lane].append(message)
+                message = self._pop_ready()
+                if message is not None:
+                    if not self._current(message, now):
+                        continue
+                    # Пока чат ждёт лимита, все его сообщения откладываются
+                    # до одного срока и возвращаются в исходном порядке.
+                    blocked = self._blocked.get(message.chat_id, 0)
+                    if blocked <= now:
+                        wait = self._reserve(message)
+                        if not wait:
+                            self._blocked.pop(message.chat_id, None)
+                            self._sending += 1
+                            return message
+                        blocked = self._blocked[message.chat_id] = now + wait
+                    self._delay(message, blocked)
+                    continue
+                timeout = None
+                if self._delayed:
+                    timeout = self._delayed[0][0] - now
+                self._condition.wait(timeout)
+        return None
+
+    def _retry(self, message, error):
+        message.attempts += 1
+        if message.attempts >= self.max_attempts:
+            logger.error(
+                f'Сообщение в чат {message.chat_id} не отправлено '
+                f'после {message.attempts} попыток: {error}'
+            )
+            self.dead_letter(message, error)
+            self._done(message)
+            return
+        delay = getattr(error.__cause__, 'retry_after', None)
+        if delay is None:
+            delay = random.uniform(0.5, 1) * 2 ** message.attempts
+        logger.warning(
+            f'Повтор отправки в чат {message.chat_id} через {delay:.1f} с: '
+            f'{error}'
+        )
+        with self._condition:
+            self._delay(message, time.monotonic() + delay)
+            self._condition.notify()
+
+    def _done(self, message):
+        if message.on_done is None:
+            return
+        try:
+            message.on_done()
+        except Exception as error:
+            logger.exception(f'Ошибка обработки доставки: {error}')
+
+    def _work(self):
+        while True:
+            message = self._take()
+            if message is None:
+                return
+            try:
+                self.send(message.chat_id, message.text)
+            except Exception as error:
+                self._retry(message, error)
+            else:
+                self._done(message)
+            finally:
+                with self._condition:
+                    self._sending -= 1
+                    self._condition.notify_all()
+
+    def start(self):
+        """Запускает фоновые потоки отправки."""
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f'outbox-{number}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while any(self._lanes) or self._delayed or self._sending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(min(remaining, 0.1))
+        return True
+
+    def stop(self, timeout=0):
+        """Останавливает потоки отправки.
+
+        С `timeout` сначала до `timeout` секунд ждёт, пока очередь
+        опустеет. Недоставленные сообщения теряются, но их `on_done` не
+        вызывается, поэтому вызывающий код может отправить их повторно.
+        """
+        if timeout and not self._drain(timeout):
+            logger.warning(
+                f'Остановка с недоставленными сообщениями: {len(self)}'
+            )
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+def broadcast(outbox, chat_ids, text, tenant_id=None, lane=LANE_INFO,
+              on_done=None):
+    """Ставит одно сообщение в очередь каждого чата-подписчика.
+
+    Подходит для любой очереди с методом put, в том числе для сводок.
+    `on_done` вызывается после доставки в каждый чат.
+    """
+    for chat_id in chat_ids:
+        outbox.put(chat_id, text, tenant_id, lane, on_done)
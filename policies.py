@@ -0,0 +1,49 @@
+import random
+
+
+class FixedPolicy:
+    """Опрашивает каждого арендатора с постоянным интервалом."""
+
+    def __init__(self, interval):
+        """Задаёт период опроса в секундах."""
+        self.interval = interval
+
+    def next_delay(self, tenant):
+        """Возвращает паузу до следующего опроса арендатора."""
+        return self.interval
+
+
+class AdaptivePolicy:
+    """Подбирает паузу по состоянию работ, ошибкам и общему бюджету.
+
+    Пока работа на ревью, опрос учащается до `fast_interval`. При ошибках
+    и в простое пауза растёт экспоненциально до `max_interval` со
+    случайным разбросом. Бюджет `rate_limit` (запросов в секунду на
+    процесс) задаёт нижнюю границу паузы для всех арендаторов.
+    """
+
+    def __init__(self, interval, fast_interval, max_interval,
+                 rate_limit=None, tenants_count=1):
+        """Задаёт обычный, быстрый и максимальный периоды опроса."""
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.max_interval = max_interval
+        self.min_interval = 0
+        if rate_limit:
+            self.min_interval = tenants_count / rate_limit
+
+    def _backoff(self, attempts):
+        delay = min(self.max_interval, self.interval * 2 ** attempts)
+        return random.uniform(delay / 2, delay)
+
+    def next_delay(self, tenant):
+        """Возвращает паузу до следующего опроса арендатора."""
+        if tenant.errors:
+            delay = self._backoff(tenant.errors - 1)
+        elif tenant.reviewing:
+            delay = self.fast_interval
+        elif tenant.idle:
+            delay = self._backoff(tenant.idle)
+        else:
+            delay = self.interval
+        return max(delay, self.min_interval)
@@ -0,0 +1,86 @@
+"""Прогоняет записанные ответы API через конвейер без обращения к сети.
+
+Пример:
+    python replay.py captures.jsonl.gz --print
+"""
+import argparse
+import json
+import time
+
+from capture import read_captures
+from diff import StatusDiff
+from homework import HOMEWORK_SCHEMA, check_response, parse_status
+from validation import Quarantine, validate_batch
+
+
+class MemoryStore:
+    """Хранилище статусов в памяти для StatusDiff."""
+
+    def __init__(self):
+        """Создаёт пустое хранилище статусов."""
+        self._statuses = {}
+
+    def load_statuses(self, tenant_id):
+        """Возвращает статусы работ арендатора."""
+        return dict(self._statuses.get(tenant_id, {}))
+
+    def set_status(self, tenant_id, homework_name, status):
+        """Запоминает статус работы."""
+        self._statuses.setdefault(tenant_id, {})[homework_name] = status
+
+
+def replay(records, sink):
+    """Пропускает записи через check_response, проверку, diff и parse_status.
+
+    Каждое получившееся уведомление передаётся в `sink(tenant, message)`.
+    Возвращает статистику прогона.
+    """
+    diff = StatusDiff(MemoryStore())
+    quarantine = Quarantine()
+    stats = {
+        'records': 0, 'homeworks': 0, 'quarantined': 0,
+        'messages': 0, 'errors': 0,
+    }
+    started = time.perf_counter()
+    for record in records:
+        stats['records'] += 1
+        tenant_id = record['tenant']
+        try:
+            if record['status'] != 200:
+                raise ValueError(f'Статус ответа {record["status"]}')
+            homeworks = check_response(json.loads(record['body']))
+            valid = list(validate_batch(
+                homeworks, HOMEWORK_SCHEMA, quarantine, tenant_id
+            ))
+            stats['homeworks'] += len(homeworks)
+            stats['quarantined'] += len(homeworks) - len(valid)
+            for item in diff.changes(tenant_id, valid):
+                sink(tenant_id, parse_status(item))
+                diff.commit(tenant_id, item)
+                stats['messages'] += 1
+        except Exception:
+            stats['errors'] += 1
+    stats['seconds'] = time.perf_counter() - started
+    if stats['seconds']:
+        stats['records_per_second'] = stats['records'] / stats['seconds']
+    return stats
+
+
+def main():
+    """Запускает повтор журнала из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='журнал, записанный с CAPTURE_FILE')
+    parser.add_argument('--print', action='store_true', dest='show',
+                        help='печатать уведомления')
+    args = parser.parse_args()
+
+    def sink(tenant_id, message):
+        if args.show:
+            print(f'[{tenant_id}] {message}')
+
+    stats = replay(read_captures(args.path), sink)
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Опрашивает всех арендаторов конкурентно в одном процессе.
+
+    В памяти хранится только куча сроков опроса и не более
+    `concurrency` выполняющихся опросов одновременно. В режиме `aligned`
+    следующий срок отсчитывается от предыдущего срока по монотонным
+    часам, а не от конца опроса, поэтому период не накапливает
+    задержки запросов.
+
+    С `budget` каждый опрос сначала ждёт токен общего бюджета запросов,
+    а `jitter` разносит первые опросы по указанному числу секунд, чтобы
+    после перезапуска не обрушить на API все запросы разом.
+    """
+
+    def __init__(self, tenants, poll, policy, concurrency=20, aligned=True,
+                 budget=None, jitter=0):
+        """Задаёт арендаторов, функцию опроса и политику периода."""
+        self.poll = poll
+        self.policy = policy
+        self.concurrency = concurrency
+        self.aligned = aligned
+        self.budget = budget
+        self.overruns = 0
+        self._counter = itertools.count()
+        self._queue = []
+        self._wakeup = None
+        self._tasks = set()
+        now = time.monotonic()
+        for tenant in tenants:
+            self._push(now + random.uniform(0, jitter), tenant)
+
+    def _push(self, due, tenant):
+        heapq.heappush(self._queue, (due, next(self._counter), tenant))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _wait_next(self):
+        while True:
+            self._wakeup.clear()
+            if self._queue:
+                delay = self._queue[0][0] - time.monotonic()
+                if delay <= 0:
+                    due, _, tenant = heapq.heappop(self._queue)
+                    return due, tenant
+            else:
+                delay = None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _next_due(self, tenant, due, started, delay):
+        now = time.monotonic()
+        logger.debug(
+            f'Цикл опроса {tenant} занял {now - started:.3f} с, '
+            f'задержка старта {started - due:.3f} с'
+        )
+        if not self.aligned or delay <= 0:
+            return now + delay
+        next_due = due + delay
+        if next_due > now:
+            return next_due
+        self.overruns += 1
+        logger.warning(
+            f'Цикл опроса {tenant} превысил период {delay:.1f} с: '
+            f'опрос {now - started:.1f} с, '
+            f'задержка старта {started - due:.1f} с'
+        )
+        return next_due + math.ceil((now - next_due) / delay) * delay
+
+    async def _run_one(self, loop, executor, semaphore, due, tenant):
+        if self.budget is not None:
+            await self.budget.acquire(tenant.tenant_id)
+        started = time.monotonic()
+        try:
+            context = contextvars.copy_context()
+            await loop.run_in_executor(
+                executor, context.run, self.poll, tenant
+            )
+        except Exception as error:
+            logger.exception(f'Опрос {tenant} завершился ошибкой: {error}')
+        finally:
+            semaphore.release()
+            delay = self.policy.next_delay(tenant)
+            self._push(self._next_due(tenant, due, started, delay), tenant)
+
+    async def run(self):
+        """Бесконечно запускает опросы по мере наступления их сроков."""
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                await semaphore.acquire()
+                due, tenant = await self._wait_next()
+                task = loop.create_task(
+                    self._run_one(loop, executor, semaphore, due, tenant)
+                )
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
@@ -0,0 +1,183 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value):
+    digest = hashlib.md5(str(value).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хеширования с виртуальными узлами.
+
+    При добавлении или удалении узла переезжает только доля ключей,
+    пропорциональная этому узлу, остальные остаются на своих местах.
+    """
+
+    def __init__(self, nodes=(), replicas=100):
+        """Строит кольцо из узлов `nodes`."""
+        self.replicas = replicas
+        self._points = []
+        self._owners = {}
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """Добавляет узел в кольцо."""
+        self.nodes.add(node)
+        for replica in range(self.replicas):
+            point = _hash(f'{node}#{replica}')
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node):
+        """Убирает узел из кольца."""
+        self.nodes.discard(node)
+        for replica in range(self.replicas):
+            point = _hash(f'{node}#{replica}')
+            if self._owners.pop(point, None) is not None:
+                self._points.remove(point)
+
+    def node_for(self, key):
+        """Возвращает узел, которому принадлежит ключ."""
+        if not self._points:
+            raise LookupError('В кольце нет узлов')
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+    def assign(self, keys):
+        """Раскладывает ключи по узлам."""
+        shards = {node: [] for node in self.nodes}
+        for key in keys:
+            shards[self.node_for(key)].append(key)
+        return shards
+
+
+class Supervisor:
+    """Держит пул процессов-воркеров, каждый со своим шардом ключей.
+
+    Воркер запускается как `target(worker_id, keys, share)`, где `share` —
+    доля всех ключей в его шарде, чтобы делить общие лимиты. Упавший
+    воркер перезапускается с тем же шардом, а при изменении числа
+    воркеров перезапускаются только те, чей шард поменялся.
+    """
+
+    def __init__(self, target, keys, workers=1, replicas=100,
+                 restart_delay=1, stop_timeout=10):
+        """Задаёт функцию воркера, ключи шардов и число воркеров."""
+        self.target = target
+        self.keys = list(keys)
+        self.restart_delay = restart_delay
+        self.stop_timeout = stop_timeout
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._ring = HashRing(range(workers), replicas)
+        self._shards = {}
+        self._processes = {}
+        self._stopped_at = {}
+        self._wanted = workers
+
+    @property
+    def workers(self):
+        """Число воркеров."""
+        return len(self._ring.nodes)
+
+    def _start(self, worker_id):
+        keys = self._shards[worker_id]
+        share = len(keys) / max(1, len(self.keys))
+        process = self._context.Process(
+            target=self.target,
+            args=(worker_id, keys, share),
+            name=f'worker-{worker_id}',
+            daemon=True,
+        )
+        process.start()
+        self._processes[worker_id] = process
+        logger.info(
+            f'Воркер {worker_id} запущен (pid {process.pid}), '
+            f'ключей в шарде: {len(keys)}'
+        )
+
+    def _stop(self, worker_id):
+        process = self._processes.pop(worker_id, None)
+        if process is None:
+            return
+        # SIGTERM: воркер досылает очередь не дольше stop_timeout.
+        process.terminate()
+        process.join(self.stop_timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        self._stopped_at.pop(worker_id, None)
+
+    def rebalance(self):
+        """Пересчитывает шарды и перезапускает воркеров с изменениями."""
+        shards = self._ring.assign(self.keys)
+        for worker_id in list(self._processes):
+            if worker_id not in shards:
+                self._stop(worker_id)
+        for worker_id, keys in sorted(shards.items()):
+            if self._shards.get(worker_id) == keys \
+                    and worker_id in self._processes:
+                continue
+            self._stop(worker_id)
+            self._shards[worker_id] = keys
+            self._start(worker_id)
+        self._shards = shards
+
+    def resize(self, workers):
+        """Меняет число воркеров и перераспределяет ключи."""
+        workers = max(1, workers)
+        while self.workers < workers:
+            self._ring.add(max(self._ring.nodes) + 1)
+        while self.workers > workers:
+            self._ring.remove(max(self._ring.nodes))
+        logger.info(f'Число воркеров: {self.workers}')
+        self.rebalance()
+
+    def request_resize(self, workers):
+        """Просит изменить число воркеров на следующем шаге run.
+
+        Безопасно вызывать из обработчика сигнала.
+        """
+        self._wanted = max(1, workers)
+
+    def check(self):
+        """Перезапускает упавших воркеров после паузы."""
+        now = time.monotonic()
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            stopped_at = self._stopped_at.setdefault(worker_id, now)
+            if stopped_at == now:
+                logger.error(
+                    f'Воркер {worker_id} завершился с кодом '
+                    f'{process.exitcode}'
+                )
+            if now - stopped_at >= self.restart_delay:
+                del self._stopped_at[worker_id]
+                self.restarts += 1
+                self._start(worker_id)
+
+    def run(self, interval=1):
+        """Запускает воркеров и следит за ними до остановки."""
+        self.rebalance()
+        try:
+            while True:
+                time.sleep(interval)
+                if self._wanted != self.workers:
+                    self.resize(self._wanted)
+                self.check()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Останавливает всех воркеров."""
+        for worker_id in list(self._processes):
+            self._stop(worker_id)
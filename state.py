@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursors (
+    tenant_id TEXT PRIMARY KEY,
+    from_date INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    tenant_id TEXT NOT NULL,
+    homework_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (tenant_id, homework_name)
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant_id TEXT,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    error TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    failed_at INTEGER NOT NULL
+);
+"""
+
+
+class StateStore:
+    """Хранит курсоры опроса и последние отправленные статусы в SQLite."""
+
+    def __init__(self, path):
+        """Открывает базу состояния и создаёт таблицы."""
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def _execute(self, query, params=()):
+        with self._lock:
+            return self._connection.execute(query, params).fetchall()
+
+    def load_cursors(self):
+        """Возвращает курсоры from_date всех арендаторов."""
+        return dict(self._execute('SELECT tenant_id, from_date FROM cursors'))
+
+    def get_cursor(self, tenant_id):
+        """Возвращает курсор from_date арендатора или 0."""
+        rows = self._execute(
+            'SELECT from_date FROM cursors WHERE tenant_id = ?', (tenant_id,)
+        )
+        return rows[0][0] if rows else 0
+
+    def set_cursor(self, tenant_id, from_date):
+        """Сохраняет курсор from_date арендатора."""
+        self._execute(
+            'INSERT INTO cursors (tenant_id, from_date) VALUES (?, ?) '
+            'ON CONFLICT (tenant_id) '
+            'DO UPDATE SET from_date = excluded.from_date',
+            (tenant_id, from_date),
+        )
+
+    def load_statuses(self, tenant_id):
+        """Возвращает последние отправленные статусы всех работ арендатора."""
+        return dict(self._execute(
+            'SELECT homework_name, status FROM statuses WHERE tenant_id = ?',
+            (tenant_id,),
+        ))
+
+    def set_status(self, tenant_id, homework_name, status):
+        """Запоминает отправленный статус домашней работы."""
+        self._execute(
+            'INSERT INTO statuses (tenant_id, homework_name, status) '
+            'VALUES (?, ?, ?) ON CONFLICT (tenant_id, homework_name) '
+            'DO UPDATE SET status = excluded.status',
+            (tenant_id, homework_name, status),
+        )
+
+    def add_dead_letter(self, message, error):
+        """Сохраняет сообщение, которое не удалось отправить."""
+        self._execute(
+            'INSERT INTO dead_letters '
+            '(tenant_id, chat_id, text, error, attempts, failed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (message.tenant_id, str(message.chat_id), message.text,
+             str(error), message.attempts, int(time.time())),
+        )
+
+    def load_dead_letters(self):
+        """Возвращает сохранённые неотправленные сообщения."""
+        return self._execute(
+            'SELECT tenant_id, chat_id, text, error FROM dead_letters '
+            'ORDER BY id'
+        )
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
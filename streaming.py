@@ -0,0 +1,108 @@
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+
+
+class StreamingResponse:
+    """Постепенно разбирает JSON-ответ API, выдавая работы по одной.
+
+    В памяти держится только текущий кусок ответа и одна работа.
+    Остальные поля верхнего уровня (например, current_date) после
+    чтения лежат в `fields`; признак наличия списка работ — в `has_list`,
+    число прочитанных работ — в `count`.
+    """
+
+    def __init__(self, chunks, key='homeworks'):
+        """Готовит разбор ответа из итератора кусков байт."""
+        self.key = key
+        self.fields = {}
+        self.has_list = False
+        self.count = 0
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._exhausted = False
+
+    def _read(self):
+        if self._exhausted:
+            return False
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._decoder.decode(chunk)
+                return True
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._exhausted = True
+        return True
+
+    def _peek(self):
+        while True:
+            while (self._pos < len(self._buffer)
+                   and self._buffer[self._pos] in WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                raise ValueError('Ответ API неожиданно закончился')
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(
+                f'Ожидался символ {char!r} на позиции {self._pos}'
+            )
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # Число на границе куска может продолжиться в следующем.
+            if end == len(self._buffer) and not self._exhausted:
+                self._read()
+                continue
+            self._pos = end
+            return value
+
+    def _items(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            item = self._value()
+            self.count += 1
+            yield item
+            if self._peek() == ']':
+                self._pos += 1
+                return
+            self._expect(',')
+
+    def get(self, key, default=None):
+        """Возвращает поле верхнего уровня, прочитанное из ответа."""
+        return self.fields.get(key, default)
+
+    def homeworks(self):
+        """Выдаёт работы из ответа по мере чтения."""
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == self.key and self._peek() == '[':
+                self.has_list = True
+                yield from self._items()
+            else:
+                self.fields[key] = self._value()
+            if self._peek() == '}':
+                return
+            self._expect(',')
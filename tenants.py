@@ -0,0 +1,110 @@
+import contextvars
+import json
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+current_tenant = contextvars.ContextVar('current_tenant', default=None)
+
+
+class Tenant:
+    """Арендатор: токен Практикума и чаты Telegram для уведомлений.
+
+    Сообщения об ошибках уходят только в основной чат `chat_id`,
+    уведомления о статусах — во все чаты `chat_ids`.
+    """
+
+    __slots__ = ('tenant_id', 'practicum_token', 'chat_id', 'chat_ids',
+                 'from_date', 'errors', 'idle', 'reviewing', 'lease_epoch',
+                 'unsent')
+
+    def __init__(self, tenant_id, practicum_token, chat_id, subscribers=()):
+        """Создаёт арендатора с чатом владельца и подписчиками."""
+        self.tenant_id = str(tenant_id)
+        self.practicum_token = practicum_token
+        self.chat_id = chat_id
+        self.chat_ids = (chat_id,)
+        self.subscribe(subscribers)
+        self.from_date = 0
+        self.errors = 0
+        self.idle = 0
+        self.reviewing = False
+        self.lease_epoch = None
+        self.unsent = 0
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API Практикума."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+    def subscribe(self, chat_ids):
+        """Добавляет чаты-подписчики, пропуская уже известные."""
+        self.chat_ids = tuple(dict.fromkeys(self.chat_ids + tuple(chat_ids)))
+
+    def __repr__(self):
+        """Возвращает идентификатор арендатора для логов."""
+        return f'Tenant({self.tenant_id!r})'
+
+
+def _from_json(path):
+    with open(path, encoding='utf-8') as file:
+        records = json.load(file)
+    return [
+        Tenant(
+            record['id'], record['practicum_token'], record['chat_id'],
+            record.get('subscribers', ()),
+        )
+        for record in records
+    ]
+
+
+def _from_sqlite(path):
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute(
+            'SELECT id, practicum_token, chat_id FROM tenants'
+        ).fetchall()
+        subscriptions = []
+        if connection.execute(
+            "SELECT 1 FROM sqlite_master "
+            "WHERE type = 'table' AND name = 'subscriptions'"
+        ).fetchone():
+            subscriptions = connection.execute(
+                'SELECT tenant_id, chat_id FROM subscriptions'
+            ).fetchall()
+    finally:
+        connection.close()
+    tenants = [Tenant(*row) for row in rows]
+    by_id = {tenant.tenant_id: tenant for tenant in tenants}
+    for tenant_id, chat_id in subscriptions:
+        tenant = by_id.get(str(tenant_id))
+        if tenant is not None:
+            tenant.subscribe((chat_id,))
+    return tenants
+
+
+def _merge_by_token(tenants):
+    merged = {}
+    for tenant in tenants:
+        owner = merged.setdefault(tenant.practicum_token, tenant)
+        if owner is not tenant:
+            logger.info(
+                f'{tenant} использует токен {owner}: '
+                f'его чаты станут подписчиками {owner}'
+            )
+            owner.subscribe(tenant.chat_ids)
+    return list(merged.values())
+
+
+def load_tenants(path):
+    """Загружает реестр арендаторов из JSON-файла или базы SQLite."""
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        tenants = _from_sqlite(path)
+    else:
+        tenants = _from_json(path)
+    identifiers = [tenant.tenant_id for tenant in tenants]
+    if len(identifiers) != len(set(identifiers)):
+        raise ValueError(f'В реестре {path} повторяются id арендаторов')
+    # Один токен опрашивается один раз, сколько бы чатов его ни читало.
+    return _merge_by_token(tenants)
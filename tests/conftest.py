@@ -1,9 +1,21 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+import requests
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+@pytest.fixture(autouse=True)
+def session_get_via_requests_get(monkeypatch):
+    """Направляет запросы общего клиента API через подменяемый requests.get."""
+    def session_get(session, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    monkeypatch.setattr(requests.Session, 'get', session_get)
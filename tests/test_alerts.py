@@ -0,0 +1,86 @@
+import requests
+
+import alerts
+import exceptions
+from alerts import ErrorAggregator, fingerprint
+from outbox import LANE_INFO
+from state import StateStore
+from tenants import Tenant
+from utils import MockOutbox, MockResponse
+
+
+class TestErrorAggregator:
+
+    def test_fingerprint_ignores_numbers(self):
+        first = exceptions.GetAPIException("{'from_date': 100}")
+        second = exceptions.GetAPIException("{'from_date': 200}")
+        assert fingerprint(first) == fingerprint(second)
+        assert fingerprint(first) != fingerprint(
+            exceptions.JsonException("{'from_date': 100}")
+        )
+
+    def test_fingerprint_ignores_object_addresses(self):
+        def connection_error(connection):
+            return requests.ConnectionError(
+                "HTTPSConnectionPool(host='practicum.yandex.ru', port=443): "
+                'Max retries exceeded with url: /api/ (Caused by '
+                'NewConnectionError(\'<urllib3.connection.HTTPSConnection '
+                f'object at {hex(id(connection))}>: Failed to establish a '
+                "new connection: [Errno 111] Connection refused'))"
+            )
+
+        connections = object(), object()
+        first, second = map(connection_error, connections)
+        assert str(first) != str(second)
+        assert fingerprint(first) == fingerprint(second)
+
+    def test_alternating_errors_alert_once(self):
+        aggregator = ErrorAggregator()
+        results = []
+        for _ in range(5):
+            results.append(aggregator.record('t', exceptions.JsonException()))
+            results.append(
+                aggregator.record('t', exceptions.GetAPIException('timeout'))
+            )
+        assert results.count(True) == 2
+
+    def test_summary_after_window(self, monkeypatch):
+        now = [1000]
+        monkeypatch.setattr(alerts.time, 'monotonic', lambda: now[0])
+        aggregator = ErrorAggregator(window=3600)
+        for _ in range(38):
+            aggregator.record('t', exceptions.JsonException('bad'))
+        assert aggregator.summaries('t') == []
+        now[0] += 3600
+        assert aggregator.summaries('t') == [
+            'JsonException x37 за последние 60 мин: bad'
+        ]
+        now[0] += 3600
+        assert aggregator.summaries('t') == []
+        assert aggregator.record('t', exceptions.JsonException('bad'))
+
+    def test_lru_bound(self):
+        aggregator = ErrorAggregator(max_size=2)
+        for number in ('a', 'b', 'c'):
+            aggregator.record('t', ValueError(number))
+        assert aggregator.record('t', ValueError('a'))
+        assert not aggregator.record('t', ValueError('c'))
+
+    def test_summaries_use_info_lane(self, monkeypatch, tmp_path):
+        import homework
+        from diff import StatusDiff
+
+        class Errors(ErrorAggregator):
+
+            def summaries(self, tenant_id):
+                return ['JsonException x3 за последние 60 мин']
+
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: MockResponse([])
+        )
+        store = StateStore(str(tmp_path / 'state.db'))
+        outbox = MockOutbox()
+        homework.poll_tenant(
+            outbox, store, StatusDiff(store), Errors(), Tenant('t', 'x', 1)
+        )
+        assert outbox.lanes == [LANE_INFO]
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+import exceptions
+from api_client import PracticumClient, deadline
+
+
+class SlowResponse:
+
+    def __init__(self, chunks, delay):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def slow_client(monkeypatch, response):
+    client = PracticumClient()
+    calls = []
+
+    def session_get(session, url, **kwargs):
+        calls.append(kwargs['stream'])
+        return response
+
+    monkeypatch.setattr(type(client.session), 'get', session_get)
+    return client, calls
+
+
+class TestPracticumClient:
+
+    def test_timeouts_passed_to_request(self, monkeypatch):
+        client = PracticumClient(connect_timeout=1, read_timeout=5)
+        calls = []
+
+        def session_get(session, url, **kwargs):
+            calls.append(kwargs['timeout'])
+
+        monkeypatch.setattr(type(client.session), 'get', session_get)
+        client.get('https://example.com')
+        assert calls == [(1, 5)]
+
+    def test_deadline_caps_timeouts(self):
+        client = PracticumClient(connect_timeout=1, read_timeout=5)
+        with deadline(2):
+            connect, read = client.timeout()
+        assert connect == 1
+        assert read <= 2
+
+    def test_exhausted_deadline(self):
+        client = PracticumClient()
+        with deadline(0):
+            time.sleep(0.001)
+            with pytest.raises(exceptions.DeadlineException):
+                client.timeout()
+
+    def test_deadline_reads_body_in_chunks(self, monkeypatch):
+        client, calls = slow_client(
+            monkeypatch, SlowResponse([b'{"a":', b' 1}'], 0)
+        )
+        with deadline(5):
+            response = client.get('https://example.com')
+        assert calls == [True]
+        assert response.content == b'{"a": 1}'
+        assert response.text == '{"a": 1}'
+        assert response.json() == {'a': 1}
+        assert not response.closed
+
+    def test_deadline_stops_slow_body(self, monkeypatch):
+        response = SlowResponse([b'x'] * 100, 0.01)
+        client, _ = slow_client(monkeypatch, response)
+        started = time.monotonic()
+        with deadline(0.1):
+            with pytest.raises(exceptions.DeadlineException):
+                client.get('https://example.com')
+        assert time.monotonic() - started < 0.5
+        assert response.closed
+
+    def test_deadline_stops_slow_stream(self, monkeypatch):
+        client, _ = slow_client(
+            monkeypatch, SlowResponse([b'x'] * 100, 0.01)
+        )
+        with deadline(0.1):
+            response = client.get('https://example.com', stream=True)
+            with pytest.raises(exceptions.DeadlineException):
+                list(client.iter_content(response))
+
+    def test_pool_is_shared(self):
+        client = PracticumClient(pool_size=7)
+        adapter = client.session.get_adapter('https://example.com')
+        assert adapter._pool_maxsize == 7
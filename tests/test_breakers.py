@@ -0,0 +1,151 @@
+import pytest
+import requests
+
+import breakers
+import exceptions
+from breakers import (CLOSED, HALF_OPEN, OPEN, BreakerRegistry,
+                      CircuitBreaker, SharedBreaker)
+from outbox import current_chat
+from tenants import Tenant, current_tenant
+
+
+def fail(breaker):
+    with pytest.raises(RuntimeError):
+        with breaker:
+            raise RuntimeError('boom')
+
+
+def fail_key(breaker, key):
+    fail(breaker.guard(key))
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker('api', threshold=3, reset_timeout=60)
+        for _ in range(3):
+            fail(breaker)
+        assert breaker.state == OPEN
+        with pytest.raises(exceptions.CircuitOpenException) as error:
+            with breaker:
+                pass
+        assert 0 < error.value.retry_after <= 60
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker('api', threshold=2)
+        fail(breaker)
+        with breaker:
+            pass
+        fail(breaker)
+        assert breaker.state == CLOSED
+
+    def test_half_open_probe(self, monkeypatch):
+        now = [1000]
+        monkeypatch.setattr(breakers.time, 'monotonic', lambda: now[0])
+        breaker = CircuitBreaker('api', threshold=1, reset_timeout=10)
+        fail(breaker)
+        now[0] += 10
+        fail(breaker)
+        assert breaker.state == OPEN
+        now[0] += 10
+        with breaker:
+            assert breaker.state == HALF_OPEN
+            with pytest.raises(exceptions.CircuitOpenException):
+                with breaker:
+                    pass
+        assert breaker.state == CLOSED
+
+    def test_registry_per_key(self):
+        registry = BreakerRegistry('api', threshold=1)
+        fail(registry.get('a'))
+        assert registry.get('a').state == OPEN
+        assert registry.get('b').state == CLOSED
+
+
+class TestSharedBreaker:
+
+    def test_one_key_does_not_open(self):
+        breaker = SharedBreaker('api', threshold=2)
+        for _ in range(5):
+            fail_key(breaker, 'a')
+        assert breaker.state == CLOSED
+
+    def test_opens_on_failures_across_keys(self):
+        breaker = SharedBreaker('api', threshold=2)
+        fail_key(breaker, 'a')
+        with breaker.guard('b'):
+            pass
+        fail_key(breaker, 'a')
+        assert breaker.state == CLOSED
+        fail_key(breaker, 'b')
+        assert breaker.state == OPEN
+        with pytest.raises(exceptions.CircuitOpenException):
+            with breaker.guard('c'):
+                pass
+
+    def test_inner_breaker_is_not_a_failure(self, monkeypatch):
+        now = [1000]
+        monkeypatch.setattr(breakers.time, 'monotonic', lambda: now[0])
+        breaker = SharedBreaker('api', threshold=1, reset_timeout=10)
+        fail_key(breaker, 'a')
+        now[0] += 10
+        inner = CircuitBreaker('a', threshold=1)
+        fail(inner)
+        with pytest.raises(exceptions.CircuitOpenException):
+            with breaker.guard('a'), inner:
+                pass
+        assert breaker.state == HALF_OPEN
+        with breaker.guard('b'):
+            pass
+        assert breaker.state == CLOSED
+
+    def test_request_api_wraps_open_circuit(self, monkeypatch):
+        import homework
+
+        calls = []
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: calls.append(args)
+        )
+        breaker = SharedBreaker('api', threshold=1)
+        breaker.record_failure('other')
+        monkeypatch.setattr(homework, 'api_breaker', breaker)
+        token = current_tenant.set(Tenant('t', 'x', 1))
+        try:
+            with pytest.raises(exceptions.GetAPIException) as error:
+                homework.request_api(0)
+        finally:
+            current_tenant.reset(token)
+        assert isinstance(error.value.__cause__,
+                          exceptions.CircuitOpenException)
+        assert calls == []
+
+    def test_send_message_opens_telegram_breaker(self, monkeypatch):
+        import homework
+
+        class FailingBot:
+
+            def __init__(self):
+                self.calls = []
+
+            def send_message(self, chat_id, text):
+                self.calls.append(chat_id)
+                raise RuntimeError('Telegram недоступен')
+
+        monkeypatch.setattr(
+            homework, 'telegram_breaker', SharedBreaker('Telegram', 2)
+        )
+        monkeypatch.setattr(
+            homework, 'telegram_breakers', BreakerRegistry('Telegram', 5)
+        )
+        bot = FailingBot()
+        errors = []
+        for chat_id in (1, 2, 3):
+            token = current_chat.set(chat_id)
+            try:
+                with pytest.raises(exceptions.SendMessageException) as error:
+                    homework.send_message(bot, 'text')
+                errors.append(error.value.__cause__)
+            finally:
+                current_chat.reset(token)
+        assert bot.calls == [1, 2]
+        assert isinstance(errors[-1], exceptions.CircuitOpenException)
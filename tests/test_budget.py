@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from budget import FairBudget
+
+
+class TestFairBudget:
+
+    def test_rate_ceiling(self):
+        budget = FairBudget(rate=50)
+
+        async def run():
+            started = time.monotonic()
+            await asyncio.gather(*(budget.acquire(i % 5) for i in range(21)))
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(run())
+        assert elapsed >= 0.38
+        assert budget.granted == 21
+
+    def test_busy_key_does_not_starve_others(self):
+        budget = FairBudget(rate=200)
+        order = []
+
+        async def request(key):
+            await budget.acquire(key)
+            order.append(key)
+
+        async def run():
+            tasks = [request('busy') for _ in range(10)]
+            tasks += [request('quiet1'), request('quiet2')]
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        assert order.index('quiet1') <= 2
+        assert order.index('quiet2') <= 3
+
+    def test_weights(self):
+        budget = FairBudget(rate=500)
+        order = []
+
+        async def request(key, weight):
+            await budget.acquire(key, weight)
+            order.append(key)
+
+        async def run():
+            tasks = [request('heavy', 3) for _ in range(9)]
+            tasks += [request('light', 1) for _ in range(3)]
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        assert order[:4].count('heavy') == 3
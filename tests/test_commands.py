@@ -0,0 +1,104 @@
+import datetime
+
+from commands import CommandListener, parse_command
+from diff import StatusDiff
+from outbox import LANE_COMMAND
+from state import StateStore
+from tenants import Tenant
+from utils import MockOutbox
+
+
+class FakeMessage:
+
+    def __init__(self, chat_id, text, age=0):
+        self.chat_id = chat_id
+        self.text = text
+        self.date = datetime.datetime.now(
+            datetime.timezone.utc
+        ) - datetime.timedelta(seconds=age)
+
+
+class FakeUpdate:
+
+    def __init__(self, update_id, message):
+        self.update_id = update_id
+        self.effective_message = message
+
+
+class FakeBot:
+
+    def __init__(self, updates):
+        self.updates = updates
+        self.offsets = []
+
+    def get_updates(self, offset=None, timeout=None, allowed_updates=None):
+        self.offsets.append(offset)
+        updates, self.updates = self.updates, []
+        return updates
+
+
+class TestCommands:
+
+    def test_parse_command(self):
+        assert parse_command('/status') == ('status', '')
+        assert parse_command('/History@homework_bot 5') == ('history', '5')
+        assert parse_command('привет') == (None, '')
+        assert parse_command(None) == (None, '')
+
+    def test_listener_dispatches_and_skips_stale(self):
+        bot = FakeBot([
+            FakeUpdate(10, FakeMessage(1, '/status')),
+            FakeUpdate(11, FakeMessage(1, 'просто текст')),
+            FakeUpdate(12, FakeMessage(2, '/status', age=3600)),
+            FakeUpdate(13, FakeMessage(3, '/unknown')),
+        ])
+        replies = []
+        listener = CommandListener(
+            bot,
+            {'status': lambda chat_id, args: f'ok {chat_id}',
+             None: lambda chat_id, args: 'help'},
+            lambda chat_id, text: replies.append((chat_id, text)),
+        )
+        listener.poll_once()
+        listener.poll_once()
+        assert replies == [(1, 'ok 1'), (3, 'help')]
+        assert bot.offsets == [None, 14]
+
+    def test_status_and_history_from_snapshot(self, monkeypatch, tmp_path):
+        import homework
+
+        def no_api(*args, **kwargs):
+            raise AssertionError('Команды не должны обращаться к API')
+
+        monkeypatch.setattr(homework, 'get_api_answer', no_api)
+        store = StateStore(str(tmp_path / 'state.db'))
+        store.set_status('a', 'old', 'approved')
+        diff = StatusDiff(store)
+        diff.commit('a', {'homework_name': 'new', 'status': 'reviewing'})
+        tenants = [Tenant('a', 'x', 1, [100]), Tenant('b', 'y', 2, [100])]
+        bot = FakeBot([
+            FakeUpdate(1, FakeMessage(1, '/status')),
+            FakeUpdate(2, FakeMessage(100, '/history')),
+            FakeUpdate(3, FakeMessage(5, '/status')),
+        ])
+        outbox = MockOutbox()
+        listener = homework.start_commands(bot, outbox, diff, tenants)
+        listener.stop()
+        listener._thread.join(1)
+        listener.poll_once()
+
+        replies = dict(outbox.sent)
+        assert replies[1].splitlines() == [
+            'Статусы работ:',
+            f'new: {homework.HOMEWORK_VERDICTS["reviewing"]}',
+            f'old: {homework.HOMEWORK_VERDICTS["approved"]}',
+        ]
+        lines = replies[100].splitlines()
+        assert lines[0] == 'Последние изменения статусов:'
+        assert lines[1] == 'a:'
+        assert lines[2].endswith(
+            f'new: {homework.HOMEWORK_VERDICTS["reviewing"]}'
+        )
+        assert lines[3:] == ['b:', 'Пока нет данных.']
+        assert replies[5] == homework.NOT_SUBSCRIBED
+        assert set(outbox.lanes) == {LANE_COMMAND}
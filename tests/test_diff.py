@@ -0,0 +1,64 @@
+from diff import HomeworkRecord, StatusDiff
+
+
+class MemoryStore:
+
+    def __init__(self, statuses=None):
+        self.statuses = dict(statuses or {})
+        self.loads = 0
+
+    def load_statuses(self, tenant_id):
+        self.loads += 1
+        return dict(self.statuses)
+
+    def set_status(self, tenant_id, homework_name, status):
+        self.statuses[homework_name] = status
+
+
+class TestStatusDiff:
+
+    def test_only_transitions(self):
+        diff = StatusDiff(MemoryStore({'hw1': 'reviewing'}))
+        homeworks = [
+            {'homework_name': 'hw1', 'status': 'reviewing'},
+            {'homework_name': 'hw2', 'status': 'approved'},
+        ]
+        assert diff.changes('t', homeworks) == [homeworks[1]]
+
+    def test_commit_updates_snapshot_and_store(self):
+        store = MemoryStore()
+        diff = StatusDiff(store)
+        homework = {'homework_name': 'hw1', 'status': 'approved'}
+        diff.commit('t', homework)
+        assert diff.changes('t', [homework]) == []
+        assert store.statuses == {'hw1': 'approved'}
+        assert store.loads == 1
+
+    def test_overlapping_window_keeps_newest(self):
+        diff = StatusDiff(MemoryStore({'hw1': 'approved'}))
+        homeworks = [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw1', 'status': 'reviewing'},
+        ]
+        assert diff.changes('t', homeworks) == []
+
+    def test_record_has_no_dict(self):
+        assert not hasattr(HomeworkRecord('approved'), '__dict__')
+
+    def test_concurrent_load_keeps_marks(self):
+        store = MemoryStore({'hw': 'reviewing'})
+        diff = StatusDiff(store)
+        load_statuses = store.load_statuses
+
+        def racing_load(tenant_id):
+            statuses = load_statuses(tenant_id)
+            if store.loads == 1:
+                # Пока команда читает базу, опрос успевает отметить смену.
+                diff.mark(tenant_id, {'homework_name': 'hw',
+                                      'status': 'approved'})
+            return statuses
+
+        store.load_statuses = racing_load
+        assert diff.statuses('t') == {'hw': 'approved'}
+        assert diff.changes('t', [{'homework_name': 'hw',
+                                   'status': 'approved'}]) == []
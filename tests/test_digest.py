@@ -0,0 +1,67 @@
+from digest import DigestBuffer, render_digest
+from utils import MockOutbox
+
+
+class TestRenderDigest:
+
+    def test_single_message_unchanged(self):
+        assert render_digest(['one']) == ['one']
+
+    def test_coalesces_messages(self):
+        result = render_digest(['one', 'two'])
+        assert len(result) == 1
+        assert result[0].endswith('one\ntwo')
+
+    def test_splits_on_line_boundaries(self):
+        messages = [f'line {number:03}' for number in range(100)]
+        chunks = render_digest(messages, limit=50)
+        assert all(len(chunk) <= 50 for chunk in chunks)
+        lines = '\n'.join(chunks).split('\n')[1:]
+        assert lines == messages
+
+    def test_splits_long_line(self):
+        chunks = render_digest(['x' * 120, 'y'], limit=50)
+        assert all(len(chunk) <= 50 for chunk in chunks)
+        assert ''.join(chunks).count('x') == 120
+
+
+class TestDigestBuffer:
+
+    def test_flushes_after_window(self):
+        outbox = MockOutbox()
+        buffer = DigestBuffer(outbox, window=60)
+        buffer.put(1, 'one')
+        buffer.put(1, 'two')
+        buffer.put(2, 'three')
+        buffer.flush()
+        assert outbox.sent == []
+        assert len(buffer) == 3
+        buffer.flush(force=True)
+        assert len(outbox.sent) == 2
+        assert (2, 'three') in outbox.sent
+        assert len(buffer) == 0
+
+    def test_stop_flushes_and_stops_outbox(self):
+        outbox = MockOutbox()
+        done = []
+        buffer = DigestBuffer(outbox, window=60)
+        buffer.start()
+        buffer.put(1, 'one', on_done=lambda: done.append('one'))
+        buffer.put(1, 'two', on_done=lambda: done.append('two'))
+        assert done == []
+        buffer.stop(timeout=5)
+        assert len(outbox.sent) == 1
+        assert done == ['one', 'two']
+        assert outbox.stopped == 5
+
+    def test_drops_messages_of_moved_lease(self):
+        outbox = MockOutbox()
+        epochs = {'a': 1, 'b': 1}
+        done = []
+        buffer = DigestBuffer(outbox, window=60, epoch=epochs.get)
+        buffer.put(1, 'one', 'a', on_done=lambda: done.append('one'))
+        buffer.put(1, 'two', 'b', on_done=lambda: done.append('two'))
+        epochs['a'] = 2
+        buffer.flush(force=True)
+        assert outbox.sent == [(1, 'two')]
+        assert done == ['two']
@@ -0,0 +1,180 @@
+import functools
+import types
+
+import leases as leases_module
+from leases import LeaseKeeper, LeaseStore
+from outbox import LANE_STATUS, Outbox
+from state import StateStore
+from tenants import Tenant
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLeaseStore:
+
+    def test_exclusive_until_expiry(self, monkeypatch, tmp_path):
+        clock = FakeClock()
+        monkeypatch.setattr(leases_module.time, 'time', clock)
+        store = LeaseStore(str(tmp_path / 'state.db'))
+        other = LeaseStore(str(tmp_path / 'state.db'))
+
+        assert store.acquire('r', 'a', 10)
+        assert not other.acquire('r', 'b', 10)
+        clock.now += 5
+        assert store.acquire('r', 'a', 10)
+        clock.now += 9
+        assert not other.acquire('r', 'b', 10)
+        clock.now += 2
+        assert other.acquire('r', 'b', 10)
+        assert not store.acquire('r', 'a', 10)
+        assert store.holders() == {'r': 'b'}
+
+    def test_release(self, tmp_path):
+        store = LeaseStore(str(tmp_path / 'state.db'))
+        store.acquire('r', 'a', 10)
+        store.release('r', 'b')
+        assert store.holders() == {'r': 'a'}
+        store.release('r', 'a')
+        assert store.acquire('r', 'b', 10)
+
+    def test_acquire_many(self, tmp_path):
+        store = LeaseStore(str(tmp_path / 'state.db'))
+        other = LeaseStore(str(tmp_path / 'state.db'))
+        other.acquire('b', 'other', 10)
+        assert store.acquire_many(['a', 'b', 'c'], 'me', 10) == {'a', 'c'}
+        assert store.holders() == {'a': 'me', 'b': 'other', 'c': 'me'}
+
+
+class TestLeaseKeeper:
+
+    def test_standby_takes_over(self, monkeypatch, tmp_path):
+        clock = FakeClock()
+        monkeypatch.setattr(leases_module.time, 'time', clock)
+        monkeypatch.setattr(leases_module.time, 'monotonic', clock)
+        path = str(tmp_path / 'state.db')
+        active = LeaseKeeper(LeaseStore(path), ['r'], 'a', ttl=9)
+        standby = LeaseKeeper(LeaseStore(path), ['r'], 'b', ttl=9)
+
+        active.heartbeat()
+        standby.heartbeat()
+        assert active.owns('r')
+        assert not standby.owns('r')
+
+        clock.now += 6
+        assert not active.owns('r')
+        clock.now += 4
+        standby.heartbeat()
+        assert standby.owns('r')
+        active.heartbeat()
+        assert not active.owns('r')
+
+    def test_heartbeat_is_one_transaction(self, tmp_path):
+        store = LeaseStore(str(tmp_path / 'state.db'))
+        statements = []
+        store._connection.set_trace_callback(statements.append)
+        keeper = LeaseKeeper(
+            store, [f'tenant:{number}' for number in range(1000)], 'a'
+        )
+        keeper.heartbeat()
+        assert statements.count('COMMIT') == 1
+        assert keeper.owns('tenant:999')
+
+    def test_stop_releases(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        keeper = LeaseKeeper(LeaseStore(path), ['r'], 'a', ttl=30)
+        keeper.start()
+        keeper.stop()
+        assert LeaseStore(path).holders() == {}
+
+    def test_poll_only_leased_tenants(self, tmp_path):
+        import homework
+        from diff import StatusDiff
+
+        path = str(tmp_path / 'state.db')
+        store = StateStore(path)
+        store.set_cursor('1', 500)
+        LeaseStore(path).acquire('tenant:2', 'other', 30)
+        keeper = LeaseKeeper(
+            LeaseStore(path), ['tenant:1', 'tenant:2'], 'a', ttl=30
+        )
+        keeper.heartbeat()
+        polled = []
+        tenants = [Tenant('1', 'x', 1), Tenant('2', 'y', 2)]
+        for tenant in tenants:
+            homework.poll_leased(
+                keeper, store, StatusDiff(store), polled.append, tenant
+            )
+        assert polled == [tenants[0]]
+        assert tenants[0].from_date == 500
+
+    def test_queued_messages_dropped_after_lease_moves(self, monkeypatch,
+                                                       tmp_path):
+        import homework
+
+        clock = FakeClock()
+        monkeypatch.setattr(
+            leases_module, 'time',
+            types.SimpleNamespace(time=clock, monotonic=clock),
+        )
+        path = str(tmp_path / 'state.db')
+        active = LeaseKeeper(LeaseStore(path), ['tenant:t'], 'a', ttl=9)
+        standby = LeaseKeeper(LeaseStore(path), ['tenant:t'], 'b', ttl=9)
+        active.heartbeat()
+        sent, done = [], []
+        outbox = Outbox(
+            lambda chat_id, text: sent.append(text),
+            lambda message, error: None, chat_rate=100,
+            epoch=functools.partial(homework.tenant_epoch, active),
+        )
+        outbox.put(1, 'old', 't', LANE_STATUS, lambda: done.append('old'))
+
+        clock.now += 10
+        standby.heartbeat()
+        active.heartbeat()
+        assert not active.owns('tenant:t')
+        clock.now += 10
+        active.heartbeat()
+        assert active.owns('tenant:t')
+        outbox.put(1, 'new', 't', LANE_STATUS, lambda: done.append('new'))
+        outbox.start()
+        outbox.stop(timeout=2)
+
+        assert sent == ['new']
+        assert done == ['new']
+        assert len(outbox) == 0
+
+    def test_queued_messages_wait_while_lease_elsewhere(self, monkeypatch,
+                                                        tmp_path):
+        import homework
+
+        clock = FakeClock()
+        monkeypatch.setattr(
+            leases_module, 'time',
+            types.SimpleNamespace(time=clock, monotonic=clock),
+        )
+        path = str(tmp_path / 'state.db')
+        active = LeaseKeeper(LeaseStore(path), ['tenant:t'], 'a', ttl=9)
+        standby = LeaseKeeper(LeaseStore(path), ['tenant:t'], 'b', ttl=9)
+        active.heartbeat()
+        sent, done = [], []
+        outbox = Outbox(
+            lambda chat_id, text: sent.append(text),
+            lambda message, error: None, chat_rate=100,
+            epoch=functools.partial(homework.tenant_epoch, active),
+        )
+        outbox.put(1, 'old', 't', LANE_STATUS, lambda: done.append('old'))
+        clock.now += 10
+        standby.heartbeat()
+        active.heartbeat()
+        outbox.start()
+        outbox.stop(timeout=0.2)
+
+        assert sent == []
+        assert done == []
@@ -0,0 +1,78 @@
+import json
+import logging
+import logging.handlers
+import threading
+
+import pytest
+
+from logs import JsonFormatter, current_cycle, setup_logging
+from tenants import Tenant, current_tenant
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    root.handlers, root.level = handlers, level
+
+
+class TestSetupLogging:
+
+    def test_json_records_with_context(self, tmp_path, restore_root_logger):
+        path = tmp_path / 'main.log'
+        listener = setup_logging(str(path), json_format=True)
+        tenant_token = current_tenant.set(Tenant('t1', 'x', 1))
+        cycle_token = current_cycle.set(7)
+        try:
+            logging.getLogger('homework').info('Сообщение отправлено')
+        finally:
+            current_cycle.reset(cycle_token)
+            current_tenant.reset(tenant_token)
+            listener.stop()
+        record = json.loads(path.read_text(encoding='utf-8').splitlines()[0])
+        assert record['message'] == 'Сообщение отправлено'
+        assert record['tenant'] == 't1'
+        assert record['cycle'] == 7
+
+    def test_traceback_formatted_by_listener(self, tmp_path,
+                                             restore_root_logger,
+                                             monkeypatch):
+        path = tmp_path / 'main.log'
+        listener = setup_logging(str(path), json_format=True)
+        calls = []
+        format_exception = JsonFormatter.formatException
+
+        def spy(formatter, exc_info):
+            calls.append(threading.current_thread())
+            return format_exception(formatter, exc_info)
+
+        monkeypatch.setattr(JsonFormatter, 'formatException', spy)
+        try:
+            try:
+                raise ValueError('boom')
+            except ValueError:
+                logging.getLogger('homework').exception('Сбой %s', 1)
+        finally:
+            listener.stop()
+        records = [
+            json.loads(line)
+            for line in path.read_text(encoding='utf-8').splitlines()
+        ]
+        assert records[0]['message'] == 'Сбой 1'
+        assert 'ValueError: boom' in records[0]['exc_info']
+        assert calls and threading.current_thread() not in calls
+
+    def test_logging_goes_through_queue(self, tmp_path, restore_root_logger):
+        listener = setup_logging(str(tmp_path / 'main.log'), max_bytes=100)
+        try:
+            handlers = logging.getLogger().handlers
+            assert len(handlers) == 1
+            assert isinstance(handlers[0], logging.handlers.QueueHandler)
+            file_handler = listener.handlers[0]
+            assert isinstance(
+                file_handler, logging.handlers.RotatingFileHandler
+            )
+            assert file_handler.maxBytes == 100
+        finally:
+            listener.stop()
@@ -0,0 +1,44 @@
+import urllib.request
+
+from metrics import Callback, Counter, Histogram, Registry, start_metrics_server
+
+
+class TestMetrics:
+
+    def test_counter_with_labels(self):
+        registry = Registry()
+        counter = Counter(
+            'errors_total', 'Ошибки', ['exception'], registry=registry
+        )
+        counter.inc('JsonException')
+        counter.inc('JsonException')
+        counter.inc('GetAPIException')
+        text = registry.render()
+        assert '# TYPE errors_total counter' in text
+        assert 'errors_total{exception="JsonException"} 2' in text
+        assert 'errors_total{exception="GetAPIException"} 1' in text
+
+    def test_histogram_buckets(self):
+        registry = Registry()
+        histogram = Histogram('latency', 'Задержка', (0.1, 1), registry)
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+        lines = histogram.samples()
+        assert 'latency_bucket{le="0.1"} 2' in lines
+        assert 'latency_bucket{le="1"} 3' in lines
+        assert 'latency_bucket{le="+Inf"} 4' in lines
+        assert 'latency_count 4' in lines
+
+    def test_server(self):
+        registry = Registry()
+        Callback('outbox_depth', 'Очередь', lambda: 3, registry=registry)
+        server = start_metrics_server(0, registry)
+        try:
+            port = server.server_address[1]
+            url = f'http://127.0.0.1:{port}/metrics'
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'outbox_depth 3' in body
@@ -0,0 +1,184 @@
+import threading
+import time
+
+from outbox import (LANE_COMMAND, LANE_ERROR, LANE_INFO, LANE_STATUS,
+                    FairQueue, Message, Outbox, TokenBucket)
+
+
+class RetryAfter(Exception):
+
+    retry_after = 0.01
+
+
+class DeadLetters:
+
+    def __init__(self):
+        self.messages = []
+        self.done = threading.Event()
+
+    def __call__(self, message, error):
+        self.messages.append((message.text, message.attempts))
+        self.done.set()
+
+
+class TestTokenBucket:
+
+    def test_rate(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        assert bucket.wait_time() == 0
+        bucket.take()
+        bucket.take()
+        assert 0 < bucket.wait_time() <= 0.1
+
+
+class TestFairQueue:
+
+    def test_round_robin_across_tenants(self):
+        queue = FairQueue()
+        for seq, text in enumerate(('a1', 'a2', 'a3')):
+            queue.append(Message(1, text, 'a', seq=seq))
+        queue.append(Message(2, 'b1', 'b', seq=3))
+        order = [queue.popleft().text for _ in range(len(queue))]
+        assert order == ['a1', 'b1', 'a2', 'a3']
+
+    def test_returned_message_keeps_its_place(self):
+        queue = FairQueue()
+        queue.append(Message(1, 'second', 'a', seq=2))
+        queue.append(Message(1, 'first', 'a', seq=1))
+        assert queue.popleft().text == 'first'
+
+
+class TestOutbox:
+
+    def test_status_lane_goes_first(self):
+        sent = []
+        done = threading.Event()
+
+        def send(chat_id, text):
+            sent.append(text)
+            if len(sent) == 4:
+                done.set()
+
+        outbox = Outbox(
+            send, DeadLetters(), rate=100, chat_rate=100, workers=1
+        )
+        outbox.put(1, 'info', 't', LANE_INFO)
+        outbox.put(1, 'error 1', 't', LANE_ERROR)
+        outbox.put(1, 'error 2', 't', LANE_ERROR)
+        outbox.put(1, 'approved', 't', LANE_STATUS)
+        outbox.start()
+        assert done.wait(2)
+        outbox.stop()
+        assert sent == ['approved', 'error 1', 'error 2', 'info']
+
+    def test_command_reply_skips_chat_backlog(self):
+        sent = []
+        first = threading.Event()
+        done = threading.Event()
+
+        def send(chat_id, text):
+            sent.append(text)
+            first.set()
+            if len(sent) == 4:
+                done.set()
+
+        outbox = Outbox(send, DeadLetters(), rate=100, chat_rate=10)
+        for number in range(3):
+            outbox.put(1, f'status {number}', 't', LANE_STATUS)
+        outbox.start()
+        assert first.wait(2)
+        outbox.put(1, 'reply', None, LANE_COMMAND)
+        assert done.wait(2)
+        outbox.stop()
+        assert sent == ['status 0', 'reply', 'status 1', 'status 2']
+
+    def test_put_does_not_block_and_sends(self):
+        sent = []
+        done = threading.Event()
+
+        def send(chat_id, text):
+            time.sleep(0.05)
+            sent.append((chat_id, text))
+            if len(sent) == 3:
+                done.set()
+
+        outbox = Outbox(send, DeadLetters(), rate=100, chat_rate=100)
+        started = time.monotonic()
+        for number in range(3):
+            outbox.put(number, f'text {number}')
+        assert time.monotonic() - started < 0.05
+        outbox.start()
+        assert done.wait(2)
+        outbox.stop()
+        assert sorted(sent) == [(0, 'text 0'), (1, 'text 1'), (2, 'text 2')]
+        assert len(outbox) == 0
+
+    def test_chat_rate_limit(self):
+        times = []
+        done = threading.Event()
+
+        def send(chat_id, text):
+            times.append(time.monotonic())
+            if len(times) == 3:
+                done.set()
+
+        outbox = Outbox(send, DeadLetters(), rate=100, chat_rate=20)
+        for _ in range(3):
+            outbox.put(1, 'text')
+        outbox.start()
+        assert done.wait(2)
+        outbox.stop()
+        assert times[2] - times[0] >= 0.09
+
+    def test_retries_then_dead_letter(self):
+        attempts = []
+
+        def send(chat_id, text):
+            attempts.append(text)
+            raise RuntimeError('boom') from RetryAfter()
+
+        dead_letters = DeadLetters()
+        outbox = Outbox(
+            send, dead_letters, chat_rate=100, max_attempts=3
+        )
+        outbox.put(1, 'text')
+        outbox.start()
+        assert dead_letters.done.wait(2)
+        outbox.stop()
+        assert attempts == ['text'] * 3
+        assert dead_letters.messages == [('text', 3)]
+
+    def test_on_done_after_send_and_dead_letter(self):
+        done = []
+
+        def send(chat_id, text):
+            if text == 'bad':
+                raise RuntimeError('boom') from RetryAfter()
+
+        outbox = Outbox(send, DeadLetters(), chat_rate=100, max_attempts=2)
+        outbox.put(1, 'good', on_done=lambda: done.append('good'))
+        outbox.put(2, 'bad', on_done=lambda: done.append('bad'))
+        outbox.start()
+        outbox.stop(timeout=2)
+        assert sorted(done) == ['bad', 'good']
+
+    def test_stop_drains_queue(self):
+        sent = []
+        outbox = Outbox(
+            lambda chat_id, text: sent.append(text), DeadLetters(),
+            chat_rate=20,
+        )
+        for number in range(3):
+            outbox.put(1, str(number))
+        outbox.start()
+        outbox.stop(timeout=2)
+        assert sent == ['0', '1', '2']
+        assert len(outbox) == 0
+
+    def test_stop_timeout_skips_on_done(self):
+        done = []
+        outbox = Outbox(lambda chat_id, text: None, DeadLetters())
+        outbox.put(1, 'text', on_done=lambda: done.append(1))
+        outbox.stop(timeout=0.05)
+        assert done == []
+        assert len(outbox) == 1
@@ -0,0 +1,37 @@
+from policies import AdaptivePolicy, FixedPolicy
+from tenants import Tenant
+
+
+class TestPolicies:
+
+    def make_policy(self, **kwargs):
+        return AdaptivePolicy(600, 60, 3600, **kwargs)
+
+    def test_fixed(self):
+        assert FixedPolicy(600).next_delay(Tenant(1, 't', 1)) == 600
+
+    def test_reviewing_polls_faster(self):
+        tenant = Tenant(1, 't', 1)
+        tenant.reviewing = True
+        assert self.make_policy().next_delay(tenant) == 60
+
+    def test_errors_back_off_with_jitter(self):
+        policy = self.make_policy()
+        tenant = Tenant(1, 't', 1)
+        tenant.errors = 3
+        delays = {policy.next_delay(tenant) for _ in range(20)}
+        assert all(1200 <= delay <= 2400 for delay in delays)
+        assert len(delays) > 1
+        tenant.errors = 20
+        assert policy.next_delay(tenant) <= 3600
+
+    def test_idle_never_polls_faster_than_interval(self):
+        tenant = Tenant(1, 't', 1)
+        tenant.idle = 1
+        assert self.make_policy().next_delay(tenant) >= 600
+
+    def test_rate_limit_sets_floor(self):
+        policy = self.make_policy(rate_limit=1, tenants_count=1000)
+        tenant = Tenant(1, 't', 1)
+        tenant.reviewing = True
+        assert policy.next_delay(tenant) == 1000
@@ -0,0 +1,119 @@
+import json
+import subprocess
+import sys
+from http import HTTPStatus
+
+import requests
+
+from capture import CaptureWriter, read_captures
+from replay import replay
+from tenants import Tenant, current_tenant
+
+
+class MockResponse:
+
+    status_code = HTTPStatus.OK
+
+    def __init__(self, data):
+        self.text = json.dumps(data)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def response(*statuses):
+    return {
+        'homeworks': [
+            {'homework_name': f'hw{number}', 'status': status}
+            for number, status in enumerate(statuses)
+        ],
+        'current_date': 1000,
+    }
+
+
+class TestReplay:
+
+    def test_capture_from_get_api_answer(self, monkeypatch, tmp_path):
+        import homework
+
+        path = str(tmp_path / 'captures.jsonl.gz')
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda url, **kwargs: MockResponse(response('approved')),
+        )
+        monkeypatch.setattr(homework, 'capture', CaptureWriter(path))
+        token = current_tenant.set(Tenant('t1', 'x', 1))
+        try:
+            homework.get_api_answer(500)
+        finally:
+            current_tenant.reset(token)
+            homework.capture.close()
+        [record] = read_captures(path)
+        assert record['tenant'] == 't1'
+        assert record['from_date'] == 500
+        assert json.loads(record['body']) == response('approved')
+
+    def test_replay_emits_only_transitions(self, tmp_path):
+        path = str(tmp_path / 'captures.jsonl.gz')
+        writer = CaptureWriter(path)
+        bodies = [
+            response('reviewing'),
+            response('reviewing', 'approved'),
+            response('approved', 'approved'),
+        ]
+        for body in bodies:
+            writer.write('t1', 0, 200, json.dumps(body))
+        writer.write('t1', 0, 500, '')
+        writer.close()
+        messages = []
+        stats = replay(
+            read_captures(path),
+            lambda tenant_id, message: messages.append(message),
+        )
+        assert stats['records'] == 4
+        assert stats['errors'] == 1
+        assert stats['messages'] == len(messages) == 3
+        assert messages[-1].startswith('Изменился статус проверки работы "hw0"')
+
+
+class TestCapture:
+
+    def test_survives_killed_writer(self, tmp_path):
+        path = str(tmp_path / 'captures.jsonl.gz')
+        script = (
+            'import os, signal\n'
+            'from capture import CaptureWriter\n'
+            f'writer = CaptureWriter({path!r})\n'
+            'for number in range(3):\n'
+            '    writer.write("t1", number, 200, "{}")\n'
+            'os.kill(os.getpid(), signal.SIGKILL)\n'
+        )
+        subprocess.run([sys.executable, '-c', script], cwd='.')
+        writer = CaptureWriter(path)
+        writer.write('t1', 3, 200, '{}')
+        writer.close()
+        records = list(read_captures(path))
+        assert [record['from_date'] for record in records] == [0, 1, 2, 3]
+
+    def test_skips_truncated_tail(self, tmp_path):
+        path = tmp_path / 'captures.jsonl.gz'
+        writer = CaptureWriter(str(path))
+        for number in range(3):
+            writer.write('t1', number, 200, '{}')
+        writer.close()
+        path.write_bytes(path.read_bytes()[:-20])
+        records = list(read_captures(str(path)))
+        assert [record['from_date'] for record in records] == [0, 1]
+
+    def test_skips_broken_member(self, tmp_path):
+        path = tmp_path / 'captures.jsonl.gz'
+        writer = CaptureWriter(str(path))
+        writer.write('t1', 0, 200, '{}')
+        writer.close()
+        broken = path.read_bytes()[:-5]
+        path.write_bytes(broken)
+        writer = CaptureWriter(str(path))
+        writer.write('t1', 1, 200, '{}')
+        writer.close()
+        records = list(read_captures(str(path)))
+        assert [record['from_date'] for record in records] == [1]
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import scheduler as scheduler_module
+from policies import FixedPolicy
+from scheduler import PollScheduler
+from tenants import Tenant
+
+
+class TestPollScheduler:
+
+    def test_polls_every_tenant_concurrently(self):
+        tenants = [Tenant(i, f'token{i}', i) for i in range(50)]
+        polled = set()
+        active = []
+        peak = []
+        lock = threading.Lock()
+        barrier = threading.Event()
+
+        def poll(tenant):
+            with lock:
+                active.append(tenant)
+                peak.append(len(active))
+            barrier.wait(0.05)
+            with lock:
+                active.remove(tenant)
+                polled.add(tenant.tenant_id)
+
+        scheduler = PollScheduler(tenants, poll, FixedPolicy(60), concurrency=10)
+
+        async def run():
+            task = asyncio.ensure_future(scheduler.run())
+            while len(polled) < len(tenants):
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(run())
+        assert len(polled) == 50
+        assert 1 < max(peak) <= 10
+
+    def test_poll_error_does_not_stop_scheduler(self):
+        tenants = [Tenant('bad', 't', 1), Tenant('good', 't', 2)]
+        polled = []
+
+        def poll(tenant):
+            polled.append(tenant.tenant_id)
+            if tenant.tenant_id == 'bad':
+                raise RuntimeError('boom')
+
+        scheduler = PollScheduler(tenants, poll, FixedPolicy(0), concurrency=1)
+
+        async def run():
+            task = asyncio.ensure_future(scheduler.run())
+            while polled.count('good') < 2:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(run())
+        assert polled.count('bad') >= 2
+
+    def test_aligned_deadlines_do_not_drift(self, monkeypatch):
+        scheduler = PollScheduler([], None, FixedPolicy(600))
+        monkeypatch.setattr(scheduler_module.time, 'monotonic', lambda: 1030)
+        assert scheduler._next_due('t', 1000, 1001, 600) == 1600
+        assert scheduler.overruns == 0
+
+    def test_relative_deadlines(self, monkeypatch):
+        scheduler = PollScheduler([], None, FixedPolicy(600), aligned=False)
+        monkeypatch.setattr(scheduler_module.time, 'monotonic', lambda: 1030)
+        assert scheduler._next_due('t', 1000, 1001, 600) == 1630
+
+    def test_overrun_skips_missed_periods(self, monkeypatch):
+        scheduler = PollScheduler([], None, FixedPolicy(600))
+        monkeypatch.setattr(scheduler_module.time, 'monotonic', lambda: 2300)
+        assert scheduler._next_due('t', 1000, 1000, 600) == 2800
+        assert scheduler.overruns == 1
+
+    def test_startup_jitter_spreads_first_polls(self, monkeypatch):
+        monkeypatch.setattr(scheduler_module.time, 'monotonic', lambda: 0)
+        tenants = [Tenant(i, 't', i) for i in range(100)]
+        scheduler = PollScheduler(tenants, None, FixedPolicy(600), jitter=600)
+        dues = sorted(due for due, _, _ in scheduler._queue)
+        assert 0 <= dues[0] < 60
+        assert 540 < dues[-1] <= 600
+
+    def test_polls_wait_for_budget(self):
+        from budget import FairBudget
+
+        tenants = [Tenant(i, 't', i) for i in range(10)]
+        polled = []
+        budget = FairBudget(rate=100)
+        scheduler = PollScheduler(
+            tenants, lambda tenant: polled.append(tenant), FixedPolicy(60),
+            budget=budget,
+        )
+
+        async def run():
+            task = asyncio.ensure_future(scheduler.run())
+            while len(polled) < len(tenants):
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(run())
+        assert budget.granted == 10
@@ -0,0 +1,86 @@
+import json
+import os
+import time
+
+from sharding import HashRing, Supervisor
+
+
+def record_shard(directory, worker_id, keys, share):
+    path = os.path.join(directory, f'{worker_id}-{os.getpid()}.json')
+    with open(path, 'w') as file:
+        json.dump({'keys': keys, 'share': share}, file)
+    time.sleep(60)
+
+
+class RecordShard:
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, worker_id, keys, share):
+        record_shard(self.directory, worker_id, keys, share)
+
+
+def wait_files(directory, count, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        names = os.listdir(directory)
+        if len(names) >= count:
+            return names
+        time.sleep(0.05)
+    raise AssertionError(f'Воркеры не запустились: {os.listdir(directory)}')
+
+
+class TestHashRing:
+
+    def test_keys_spread_over_nodes(self):
+        ring = HashRing(range(4))
+        shards = ring.assign(str(key) for key in range(4000))
+        assert sorted(shards) == [0, 1, 2, 3]
+        assert all(600 < len(keys) < 1400 for keys in shards.values())
+
+    def test_adding_node_moves_few_keys(self):
+        keys = [str(key) for key in range(4000)]
+        ring = HashRing(range(4))
+        before = {key: ring.node_for(key) for key in keys}
+        ring.add(4)
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        assert all(ring.node_for(key) == 4 for key in moved)
+        assert len(moved) < 1400
+
+    def test_remove_node(self):
+        ring = HashRing(range(3))
+        ring.remove(1)
+        assert {ring.node_for(str(key)) for key in range(100)} == {0, 2}
+
+
+class TestSupervisor:
+
+    def test_rebalance_and_restart(self, tmp_path):
+        keys = [str(key) for key in range(40)]
+        supervisor = Supervisor(
+            RecordShard(str(tmp_path)), keys, workers=2, restart_delay=0
+        )
+        try:
+            supervisor.rebalance()
+            names = wait_files(str(tmp_path), 2)
+            shards = [
+                json.loads((tmp_path / name).read_text()) for name in names
+            ]
+            assert sorted(sum((shard['keys'] for shard in shards), [])) == \
+                sorted(keys)
+            assert sum(shard['share'] for shard in shards) == 1
+
+            supervisor.resize(3)
+            assert supervisor.workers == 3
+            wait_files(str(tmp_path), 4)
+
+            process = supervisor._processes[0]
+            process.kill()
+            process.join()
+            supervisor.check()
+            supervisor.check()
+            assert supervisor.restarts == 1
+            assert supervisor._processes[0].is_alive()
+        finally:
+            supervisor.stop()
@@ -0,0 +1,124 @@
+import requests
+
+from alerts import ErrorAggregator
+from diff import StatusDiff
+from state import StateStore
+from tenants import Tenant
+from utils import HeldOutbox, MockOutbox, MockResponse
+
+
+class TestStateStore:
+
+    def test_cursor_roundtrip(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        store = StateStore(path)
+        store.set_cursor('a', 100)
+        store.set_cursor('a', 200)
+        store.close()
+        assert StateStore(path).load_cursors() == {'a': 200}
+
+    def test_status_roundtrip(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.db'))
+        assert store.load_statuses('a') == {}
+        store.set_status('a', 'hw', 'reviewing')
+        store.set_status('a', 'hw', 'approved')
+        store.set_status('b', 'hw', 'rejected')
+        assert store.load_statuses('a') == {'hw': 'approved'}
+        assert store.load_statuses('b') == {'hw': 'rejected'}
+
+    def test_restart_does_not_resend(self, monkeypatch, tmp_path):
+        import homework
+
+        homeworks = [{'homework_name': 'hw1', 'status': 'approved'}]
+        cursors = []
+
+        def mock_get(url, params=None, **kwargs):
+            cursors.append(params['from_date'])
+            return MockResponse(homeworks)
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        path = str(tmp_path / 'state.db')
+        outbox = MockOutbox()
+
+        store = StateStore(path)
+        homework.poll_tenant(
+            outbox, store, StatusDiff(store), ErrorAggregator(),
+            Tenant('t', 'x', 1),
+        )
+        restarted = Tenant('t', 'x', 1)
+        store = StateStore(path)
+        restarted.from_date = store.load_cursors()['t']
+        homework.poll_tenant(
+            outbox, store, StatusDiff(store), ErrorAggregator(), restarted
+        )
+
+        assert len(outbox.sent) == 1
+        assert cursors == [0, 1000]
+
+    def test_status_saved_only_after_delivery(self, monkeypatch, tmp_path):
+        import homework
+
+        homeworks = [{'homework_name': 'hw1', 'status': 'approved'}]
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: MockResponse(homeworks)
+        )
+        store = StateStore(str(tmp_path / 'state.db'))
+        diff = StatusDiff(store)
+        outbox = HeldOutbox()
+        tenant = Tenant('t', 'x', 1)
+
+        homework.poll_tenant(outbox, store, diff, ErrorAggregator(), tenant)
+        homework.poll_tenant(outbox, store, diff, ErrorAggregator(), tenant)
+        assert len(outbox.sent) == 1
+        assert store.load_statuses('t') == {}
+        assert store.load_cursors() == {}
+
+        outbox.deliver()
+        assert store.load_statuses('t') == {'hw1': 'approved'}
+        assert store.load_cursors() == {'t': 1000}
+
+    def test_repoll_on_same_cursor_hits_api(self, monkeypatch, tmp_path):
+        import homework
+
+        homeworks = [{'homework_name': 'hw1', 'status': 'reviewing'}]
+        cursors = []
+
+        def mock_get(url, params=None, **kwargs):
+            cursors.append(params['from_date'])
+            return MockResponse([dict(homework) for homework in homeworks])
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        store = StateStore(str(tmp_path / 'state.db'))
+        diff = StatusDiff(store)
+        outbox = MockOutbox()
+        tenant = Tenant('t', 'x', 1)
+        for status in ('reviewing', 'approved', 'approved'):
+            homeworks[0]['status'] = status
+            homework.poll_tenant(
+                outbox, store, diff, ErrorAggregator(), tenant
+            )
+
+        assert cursors == [0, 1000, 1000]
+        assert len(outbox.sent) == 2
+
+
+class TestNextTimestamp:
+
+    def test_uses_server_current_date(self):
+        import homework
+
+        response = {'homeworks': [], 'current_date': 1500}
+        assert homework.get_next_timestamp(response, 1000) == 1500
+
+    def test_rejects_non_monotonic_current_date(self):
+        import homework
+
+        response = {'homeworks': [], 'current_date': 900}
+        assert homework.get_next_timestamp(response, 1000) == 1000
+
+    def test_keeps_cursor_without_current_date(self):
+        import homework
+
+        assert homework.get_next_timestamp({'homeworks': []}, 1000) == 1000
+        response = {'homeworks': [], 'current_date': '1500'}
+        assert homework.get_next_timestamp(response, 1000) == 1000
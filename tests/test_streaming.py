@@ -0,0 +1,107 @@
+import json
+from http import HTTPStatus
+
+import pytest
+import requests
+
+from diff import StatusDiff
+from state import StateStore
+from streaming import StreamingResponse
+from tenants import Tenant
+from utils import MockOutbox
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class MockStreamResponse:
+
+    status_code = HTTPStatus.OK
+
+    def __init__(self, body):
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        return iter(chunked(self.body, 5))
+
+
+class TestStreamingResponse:
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 7, 1024])
+    def test_any_chunk_boundaries(self, size):
+        homeworks = [
+            {'homework_name': f'работа {i}', 'status': 'approved', 'id': i}
+            for i in range(20)
+        ]
+        data = json.dumps(
+            {'homeworks': homeworks, 'current_date': 1600000000},
+            ensure_ascii=False,
+        ).encode()
+        stream = StreamingResponse(chunked(data, size))
+        assert list(stream.homeworks()) == homeworks
+        assert stream.get('current_date') == 1600000000
+        assert stream.count == 20
+        assert stream.has_list
+
+    def test_fields_before_list(self):
+        stream = StreamingResponse([b'{"current_date": 5, "homeworks": []}'])
+        assert list(stream.homeworks()) == []
+        assert stream.fields == {'current_date': 5}
+        assert stream.has_list
+
+    def test_homeworks_not_list(self):
+        stream = StreamingResponse([b'{"homeworks": {"a": 1}}'])
+        assert list(stream.homeworks()) == []
+        assert stream.fields == {'homeworks': {'a': 1}}
+        assert not stream.has_list
+
+    @pytest.mark.parametrize('body', [b'[]', b'{"homeworks": [1, 2', b''])
+    def test_malformed(self, body):
+        with pytest.raises(ValueError):
+            list(StreamingResponse([body]).homeworks())
+
+
+class TestStreamingCycle:
+
+    def test_run_cycle(self, monkeypatch, tmp_path):
+        import homework
+
+        body = json.dumps({
+            'homeworks': [
+                {'homework_name': 'hw2', 'status': 'reviewing'},
+                {'homework_name': 'hw1', 'status': 'approved'},
+                {'homework_name': 'hw1', 'status': 'reviewing'},
+            ],
+            'current_date': 1000,
+        }).encode()
+
+        def mock_get(url, stream=False, **kwargs):
+            assert stream
+            return MockStreamResponse(body)
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        monkeypatch.setattr(homework, 'STREAM_RESPONSES', True)
+        store = StateStore(str(tmp_path / 'state.db'))
+        tenant = Tenant('t', 'x', 1)
+        outbox = MockOutbox()
+        homework.run_cycle(outbox, store, StatusDiff(store), tenant)
+
+        assert len(outbox.sent) == 2
+        assert tenant.from_date == 1000
+        assert tenant.reviewing
+        assert store.load_statuses('t') == {
+            'hw1': 'approved', 'hw2': 'reviewing'
+        }
+
+    def test_check_stream_errors(self):
+        import homework
+
+        with pytest.raises(KeyError):
+            list(homework.check_stream(StreamingResponse([b'{}'])))
+        with pytest.raises(homework.exceptions.APIResponseException):
+            list(homework.check_stream(
+                StreamingResponse([b'{"homeworks": 1}'])
+            ))
+        with pytest.raises(homework.exceptions.JsonException):
+            list(homework.check_stream(StreamingResponse([b'{"homew'])))
@@ -0,0 +1,125 @@
+import json
+import sqlite3
+
+import pytest
+import requests
+
+from tenants import Tenant, current_tenant, load_tenants
+from utils import MockOutbox, MockResponse
+
+
+class TestTenants:
+
+    def test_load_json(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'id': 1, 'practicum_token': 'token1', 'chat_id': 11},
+            {'id': 2, 'practicum_token': 'token2', 'chat_id': 22},
+        ]))
+        tenants = load_tenants(str(path))
+        assert [tenant.tenant_id for tenant in tenants] == ['1', '2']
+        assert tenants[1].headers == {'Authorization': 'OAuth token2'}
+        assert tenants[0].from_date == 0
+
+    def test_load_sqlite(self, tmp_path):
+        path = str(tmp_path / 'tenants.db')
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE tenants (id TEXT, practicum_token TEXT, chat_id TEXT)'
+        )
+        connection.execute("INSERT INTO tenants VALUES ('a', 't', '1')")
+        connection.commit()
+        connection.close()
+        tenants = load_tenants(path)
+        assert len(tenants) == 1
+        assert tenants[0].chat_id == '1'
+
+    def test_duplicate_ids(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'id': 1, 'practicum_token': 'a', 'chat_id': 1},
+            {'id': 1, 'practicum_token': 'b', 'chat_id': 2},
+        ]))
+        with pytest.raises(ValueError):
+            load_tenants(str(path))
+
+    def test_json_subscribers(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'id': 1, 'practicum_token': 'a', 'chat_id': 1,
+             'subscribers': [2, 1, 3]},
+        ]))
+        tenant, = load_tenants(str(path))
+        assert tenant.chat_id == 1
+        assert tenant.chat_ids == (1, 2, 3)
+
+    def test_sqlite_subscriptions(self, tmp_path):
+        path = str(tmp_path / 'tenants.db')
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE tenants (id TEXT, practicum_token TEXT, chat_id TEXT)'
+        )
+        connection.execute(
+            'CREATE TABLE subscriptions (tenant_id TEXT, chat_id TEXT)'
+        )
+        connection.execute("INSERT INTO tenants VALUES ('a', 't', '1')")
+        connection.executemany(
+            'INSERT INTO subscriptions VALUES (?, ?)',
+            [('a', '2'), ('a', '3'), ('missing', '4')],
+        )
+        connection.commit()
+        connection.close()
+        tenant, = load_tenants(path)
+        assert tenant.chat_ids == ('1', '2', '3')
+
+    def test_same_token_polled_once(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'id': 1, 'practicum_token': 'a', 'chat_id': 1},
+            {'id': 2, 'practicum_token': 'b', 'chat_id': 2},
+            {'id': 3, 'practicum_token': 'a', 'chat_id': 3},
+        ]))
+        tenants = load_tenants(str(path))
+        assert [tenant.tenant_id for tenant in tenants] == ['1', '2']
+        assert tenants[0].chat_ids == (1, 3)
+
+    def test_status_broadcast_to_subscribers(self, monkeypatch, tmp_path):
+        import homework
+        from diff import StatusDiff
+        from state import StateStore
+
+        calls = []
+
+        def mock_get(*args, **kwargs):
+            calls.append(1)
+            return MockResponse(
+                [{'homework_name': 'hw', 'status': 'approved'}],
+                current_date=1,
+            )
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        store = StateStore(str(tmp_path / 'state.db'))
+        outbox = MockOutbox()
+        homework.run_cycle(
+            outbox, store, StatusDiff(store), Tenant('t', 'x', 1, [2, 3])
+        )
+        assert [chat_id for chat_id, _ in outbox.sent] == [1, 2, 3]
+        assert len(calls) == 1
+
+    def test_headers_follow_current_tenant(self, monkeypatch):
+        import homework
+
+        calls = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            calls.append(headers['Authorization'])
+            raise ConnectionError
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        token = current_tenant.set(Tenant('x', 'tenant-token', 1))
+        try:
+            with pytest.raises(Exception):
+                homework.get_api_answer(0)
+        finally:
+            current_tenant.reset(token)
+        assert calls == ['OAuth tenant-token']
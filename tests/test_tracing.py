@@ -0,0 +1,87 @@
+import json
+import tracemalloc
+
+import pytest
+
+import tracing
+from tenants import Tenant, current_tenant
+
+
+@pytest.fixture
+def exporter():
+    exporter = tracing.RingBufferExporter(size=2)
+    tracing.configure(exporter)
+    yield exporter
+    tracing.configure(None)
+
+
+class TestTracing:
+
+    def test_disabled_by_default(self):
+        with tracing.span('noop'):
+            pass
+
+    def test_ring_buffer(self, exporter):
+        token = current_tenant.set(Tenant('t', 'x', 1))
+        try:
+            for name in ('a', 'b', 'c'):
+                with tracing.span(name):
+                    pass
+        finally:
+            current_tenant.reset(token)
+        assert [span.name for span in exporter.spans] == ['b', 'c']
+        assert exporter.spans[0].tenant == 't'
+        assert exporter.spans[0].duration >= 0
+
+    def test_span_recorded_on_error(self, exporter):
+        with pytest.raises(ValueError):
+            with tracing.span('failing'):
+                raise ValueError
+        assert exporter.spans[0].name == 'failing'
+
+    def test_chrome_trace(self, tmp_path):
+        path = tmp_path / 'trace.json'
+        exporter = tracing.ChromeTraceExporter(str(path))
+        tracing.configure(exporter)
+        try:
+            with tracing.span('get_api_answer'):
+                pass
+        finally:
+            tracing.configure(None)
+            exporter.close()
+        text = path.read_text(encoding='utf-8').rstrip().rstrip(',')
+        events = json.loads(text + ']')
+        assert events[0]['name'] == 'get_api_answer'
+        assert events[0]['ph'] == 'X'
+
+    def test_profiled_writes_snapshots(self, tmp_path):
+        with tracing.profiled(str(tmp_path), 'cycle-t-1'):
+            sum(range(1000))
+        tracemalloc.stop()
+        assert (tmp_path / 'cycle-t-1.prof').exists()
+        assert (tmp_path / 'cycle-t-1.alloc.txt').exists()
+
+    def test_profiled_sampling_and_cap(self, tmp_path):
+        for cycle in range(9):
+            with tracing.profiled(
+                str(tmp_path), f'cycle-{cycle}', every=2, max_files=3
+            ):
+                pass
+        assert len(list(tmp_path.glob('*.prof'))) == 3
+
+    def test_profiled_stops_own_tracemalloc(self, tmp_path):
+        with tracing.profiled(str(tmp_path), 'own'):
+            assert tracemalloc.is_tracing()
+        assert not tracemalloc.is_tracing()
+        tracemalloc.start()
+        try:
+            with tracing.profiled(str(tmp_path), 'shared'):
+                pass
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+    def test_profiled_disabled(self, tmp_path):
+        with tracing.profiled(None, 'cycle'):
+            pass
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,80 @@
+import json
+
+import requests
+
+from diff import StatusDiff
+from state import StateStore
+from tenants import Tenant
+from utils import MockOutbox, MockResponse
+from validation import Quarantine, Schema, validate_batch
+
+SCHEMA = Schema({
+    'homework_name': str,
+    'status': (str, ('approved', 'rejected')),
+})
+
+
+class MockCounter:
+
+    def __init__(self):
+        self.reasons = []
+
+    def inc(self, reason):
+        self.reasons.append(reason)
+
+
+class TestValidation:
+
+    def test_schema_reasons(self):
+        assert SCHEMA.check({'homework_name': 'hw', 'status': 'approved'}) \
+            is None
+        assert SCHEMA.check([])[0] == 'not_object'
+        assert SCHEMA.check({'status': 'approved'})[0] == \
+            'missing:homework_name'
+        assert SCHEMA.check({'homework_name': 1, 'status': 'approved'})[0] \
+            == 'type:homework_name'
+        assert SCHEMA.check({'homework_name': 'hw', 'status': 'new'})[0] == \
+            'value:status'
+
+    def test_batch_keeps_good_items(self, tmp_path):
+        path = tmp_path / 'quarantine.jsonl'
+        counter = MockCounter()
+        quarantine = Quarantine(str(path), counter)
+        items = [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2'},
+            {'homework_name': 'hw3', 'status': 'unknown'},
+            {'homework_name': 'hw4', 'status': 'rejected'},
+        ]
+        good = list(validate_batch(items, SCHEMA, quarantine, 't'))
+        quarantine.close()
+
+        assert good == [items[0], items[3]]
+        assert counter.reasons == ['missing:status', 'value:status']
+        records = [json.loads(line) for line in path.read_text().split('\n')
+                   if line]
+        assert [record['item'] for record in records] == items[1:3]
+        assert records[0]['tenant'] == 't'
+
+    def test_run_cycle_skips_bad_items(self, monkeypatch, tmp_path):
+        import homework
+
+        homeworks = [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'unknown'},
+            {'status': 'approved'},
+            {'homework_name': 'hw3', 'status': 'rejected'},
+        ]
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: MockResponse(homeworks)
+        )
+        store = StateStore(str(tmp_path / 'state.db'))
+        tenant = Tenant('t', 'x', 1)
+        outbox = MockOutbox()
+        homework.run_cycle(outbox, store, StatusDiff(store), tenant)
+
+        assert len(outbox.sent) == 2
+        assert tenant.from_date == 1000
+        assert store.load_statuses('t') == {
+            'hw1': 'approved', 'hw3': 'rejected'
+        }
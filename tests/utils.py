@@ -1,3 +1,5 @@
+import json
+from http import HTTPStatus
 from inspect import signature
 from types import ModuleType
 
@@ -37,3 +39,58 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+class MockResponse:
+    """API response with the given homeworks and current_date."""
+
+    status_code = HTTPStatus.OK
+
+    def __init__(self, homeworks, current_date=1000):
+        self.homeworks = homeworks
+        self.current_date = current_date
+
+    def json(self):
+        return {'homeworks': self.homeworks, 'current_date': self.current_date}
+
+    def iter_content(self, chunk_size=1):
+        yield json.dumps(self.json()).encode()
+
+
+class MockOutbox:
+    """Outbox that delivers every message as soon as it is queued."""
+
+    def __init__(self):
+        self.sent = []
+        self.lanes = []
+        self.stopped = None
+
+    def __len__(self):
+        return 0
+
+    def put(self, chat_id, text, tenant_id=None, lane=None, on_done=None):
+        self.sent.append((chat_id, text))
+        self.lanes.append(lane)
+        self.delivered(on_done)
+
+    def delivered(self, on_done):
+        if on_done is not None:
+            on_done()
+
+    def stop(self, timeout=0):
+        self.stopped = timeout
+
+
+class HeldOutbox(MockOutbox):
+    """Outbox that keeps messages undelivered until deliver() is called."""
+
+    def __init__(self):
+        super().__init__()
+        self.pending = []
+
+    def delivered(self, on_done):
+        self.pending.append(on_done)
+
+    def deliver(self):
+        pending, self.pending = self.pending, []
+        for on_done in pending:
+            super().delivered(on_done)
@@ -0,0 +1,160 @@
+import cProfile
+import collections
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from logs import current_cycle
+from tenants import current_tenant
+
+logger = logging.getLogger(__name__)
+
+_exporter = None
+_profile_lock = threading.Lock()
+_profile_calls = itertools.count()
+
+
+class Span:
+    """Завершённый интервал работы одной стадии цикла."""
+
+    __slots__ = ('name', 'start', 'duration', 'thread', 'tenant', 'cycle')
+
+    def __init__(self, name, start, duration, thread, tenant, cycle):
+        """Запоминает стадию, её время и контекст цикла."""
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.thread = thread
+        self.tenant = tenant
+        self.cycle = cycle
+
+
+class LogExporter:
+    """Пишет интервалы в лог."""
+
+    def export(self, span):
+        """Записывает интервал."""
+        logger.info(
+            f'span {span.name} {span.duration * 1000:.1f} мс '
+            f'(цикл {span.cycle})'
+        )
+
+
+class RingBufferExporter:
+    """Хранит последние `size` интервалов в памяти."""
+
+    def __init__(self, size=10000):
+        """Создаёт буфер на `size` интервалов."""
+        self.spans = collections.deque(maxlen=size)
+
+    def export(self, span):
+        """Записывает интервал."""
+        self.spans.append(span)
+
+
+class ChromeTraceExporter:
+    """Пишет интервалы в файл trace-event JSON для chrome://tracing."""
+
+    def __init__(self, path):
+        """Задаёт путь к файлу трассировки."""
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write('[\n')
+
+    def export(self, span):
+        """Записывает интервал."""
+        event = {
+            'name': span.name,
+            'ph': 'X',
+            'ts': span.start * 1e6,
+            'dur': span.duration * 1e6,
+            'pid': os.getpid(),
+            'tid': span.thread,
+            'args': {'tenant': span.tenant, 'cycle': span.cycle},
+        }
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            self._file.write(f'{line},\n')
+            self._file.flush()
+
+    def close(self):
+        """Закрывает файл трассы."""
+        with self._lock:
+            self._file.close()
+
+
+def configure(exporter):
+    """Включает трассировку с указанным экспортёром или выключает её."""
+    global _exporter
+    _exporter = exporter
+
+
+@contextmanager
+def span(name):
+    """Замеряет длительность блока, если трассировка включена."""
+    if _exporter is None:
+        yield
+        return
+    start = time.time()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        tenant = current_tenant.get()
+        _exporter.export(Span(
+            name, start, time.perf_counter() - started,
+            threading.get_ident(),
+            None if tenant is None else tenant.tenant_id,
+            current_cycle.get(),
+        ))
+
+
+def _profile_count(directory):
+    return sum(name.endswith('.prof') for name in os.listdir(directory))
+
+
+@contextmanager
+def profiled(directory, label, top=20, every=1, max_files=None):
+    """Снимает профиль CPU и аллокаций блока в `directory`.
+
+    Профилируется каждый `every`-й вызов и не больше `max_files`
+    профилей в каталоге; одновременно — только один блок, остальные
+    выполняются без профилировщика. cProfile видит только текущий поток,
+    а снимок tracemalloc включает аллокации всех потоков процесса.
+    Если трассировку аллокаций включил профилировщик, он её и выключает.
+    """
+    if (not directory or next(_profile_calls) % every
+            or not _profile_lock.acquire(blocking=False)):
+        yield
+        return
+    if max_files is not None and _profile_count(directory) >= max_files:
+        _profile_lock.release()
+        yield
+        return
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        after = tracemalloc.take_snapshot()
+        if started:
+            tracemalloc.stop()
+        _profile_lock.release()
+        path = os.path.join(directory, label)
+        profile.dump_stats(f'{path}.prof')
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = after.filter_traces(ignore).compare_to(
+            before.filter_traces(ignore), 'lineno'
+        )[:top]
+        with open(f'{path}.alloc.txt', 'w', encoding='utf-8') as file:
+            file.writelines(f'{stat}\n' for stat in stats)
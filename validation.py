@@ -0,0 +1,89 @@
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Schema:
+    """Заранее разобранная схема элемента ответа API.
+
+    `fields` сопоставляет обязательному полю его тип или пару
+    (тип, допустимые значения). Проверка возвращает короткую причину
+    отказа для счётчиков и текст для журнала карантина.
+    """
+
+    def __init__(self, fields):
+        """Задаёт типы и допустимые значения полей."""
+        self._checks = tuple(
+            (name, spec[0], frozenset(spec[1]))
+            if isinstance(spec, tuple) else (name, spec, None)
+            for name, spec in fields.items()
+        )
+
+    def check(self, item):
+        """Возвращает (причина, описание) ошибки или None."""
+        if not isinstance(item, dict):
+            return 'not_object', 'Элемент не является объектом'
+        for name, kind, choices in self._checks:
+            if name not in item:
+                return f'missing:{name}', f'Нет ключа {name}'
+            value = item[name]
+            if not isinstance(value, kind):
+                return f'type:{name}', f'Неверный тип {name}: {value!r}'
+            if choices is not None and value not in choices:
+                return f'value:{name}', f'Недопустимое {name}: {value!r}'
+        return None
+
+
+class Quarantine:
+    """Журнал отбракованных элементов в виде JSON-строк.
+
+    Без пути элементы только пишутся в лог и подсчитываются.
+    """
+
+    def __init__(self, path=None, counter=None):
+        """Задаёт файл журнала и метрику отбракованных работ."""
+        self.counter = counter
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def put(self, tenant_id, item, reason, description):
+        """Откладывает элемент в карантин."""
+        logger.warning(f'Элемент ответа API в карантине: {description}')
+        if self.counter is not None:
+            self.counter.inc(reason)
+        if self._file is None:
+            return
+        record = json.dumps({
+            'ts': time.time(),
+            'tenant': tenant_id,
+            'reason': reason,
+            'item': item,
+        }, ensure_ascii=False, default=repr)
+        with self._lock:
+            self._file.write(record + '\n')
+            self._file.flush()
+
+    def close(self):
+        """Закрывает журнал."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
+
+def validate_batch(items, schema, quarantine, tenant_id=None):
+    """Выдаёт корректные элементы, остальные отправляет в карантин.
+
+    Проверяет элементы за один проход и не прерывается на первом
+    плохом, поэтому подходит и для потокового ответа.
+    """
+    for item in items:
+        error = schema.check(item)
+        if error is None:
+            yield item
+        else:
+            quarantine.put(tenant_id, item, *error)